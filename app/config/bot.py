@@ -10,4 +10,10 @@ if not BOT_TOKEN:
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set in the environment variables")
\ No newline at end of file
+    raise RuntimeError("DATABASE_URL is not set in the environment variables")
+
+# Telegram id администраторов через запятую: им доступны служебные команды
+# (например, /import)
+ADMIN_IDS = frozenset(
+    int(admin_id) for admin_id in os.getenv("ADMIN_IDS", "").split(",") if admin_id.strip()
+)
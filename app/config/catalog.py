@@ -0,0 +1,12 @@
+# Количество книг на одной странице каталога
+CATALOG_PAGE_SIZE = 10
+
+# Сколько страниц жанров держать в памяти (LRU); каталог меняется только
+# при синхронизации, поэтому срок жизни записей не ограничен
+CATALOG_PAGES_CACHE_SIZE = 5000
+
+# Сколько готовых клавиатур каталога (InlineKeyboardMarkup) держать в памяти
+CATALOG_KEYBOARDS_CACHE_SIZE = 5000
+
+# Сколько карточек книг (книга + жанр + файлы) держать в памяти
+BOOK_CARD_CACHE_SIZE = 2000
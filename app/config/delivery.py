@@ -0,0 +1,20 @@
+from .storage import BASE_DIR
+
+# Отправка пользователям сжатых вариантов книг (например, .fb2.zip) вместо
+# исходных файлов. Варианты готовятся при синхронизации хранилища.
+DELIVERY_COMPRESSION = False
+
+# Для каких форматов готовить сжатые варианты
+DELIVERY_COMPRESS_FORMATS = ("fb2", "txt", "rtf")
+
+# Каталог кэша сжатых вариантов
+DELIVERY_CACHE_DIR = BASE_DIR / "storage" / "delivery"
+
+# Предельный размер кэша в байтах; сверх него удаляются давно не отправлявшиеся варианты
+DELIVERY_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Вариант сохраняется, только если он меньше исходного файла хотя бы на эту долю
+DELIVERY_MIN_SAVING = 0.1
+
+# Число процессов для сжатия при синхронизации (None — по числу ядер)
+DELIVERY_COMPRESS_WORKERS = None
@@ -7,3 +7,42 @@ CANDIDATES_LIMIT = 1000
 # Веса для комбинированного скора
 TITLE_WEIGHT = 0.8
 AUTHOR_WEIGHT = 0.2
+
+# Источник кандидатов для поиска:
+#   "trigram"  — триграммный индекс в памяти процесса (строится при старте),
+#   "postgres" — tsvector + pg_trgm (GIN-индексы) с ранжированием в PostgreSQL,
+#                на других СУБД автоматически откатывается на "like",
+#   "like"     — LIKE '%слово%' по БД (полный скан таблицы)
+SEARCH_BACKEND = "trigram"
+
+# Минимальная доля совпавших триграмм запроса, чтобы книга стала кандидатом
+SEARCH_INDEX_MIN_SIMILARITY = 0.3
+
+# Порог word_similarity (pg_trgm) для кандидатов в режиме "postgres"
+SEARCH_PG_MIN_SIMILARITY = 0.3
+
+# Число потоков для пакетного скоринга RapidFuzz (process.cdist, -1 — все ядра)
+SEARCH_SCORING_WORKERS = -1
+
+# Кэш результатов search_books: максимум записей и время жизни (секунды)
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL = 300
+
+# Сохранённые ранжирования для листания результатов поиска:
+# максимум записей и сколько секунд по ним можно листать
+SEARCH_PAGES_CACHE_SIZE = 5000
+SEARCH_PAGES_TTL = 600
+
+# Inline-режим (@bot <текст>): сколько книг показывать, сколько секунд ждать
+# следующего нажатия перед поиском, и кэш кандидатов по префиксу запроса
+# (только для бэкендов "postgres" и "like"; с триграммным индексом не используется)
+INLINE_SEARCH_LIMIT = 20
+INLINE_DEBOUNCE_SECONDS = 0.3
+SEARCH_PREFIX_CACHE_SIZE = 2000
+SEARCH_PREFIX_CACHE_TTL = 60
+
+# Где выполнять скоринг кандидатов, чтобы не блокировать event loop:
+#   None — прямо в event loop, "thread" — в пуле потоков (RapidFuzz отпускает GIL),
+#   "process" — в пуле процессов
+SEARCH_EXECUTOR = None
+SEARCH_EXECUTOR_WORKERS = 2
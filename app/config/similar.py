@@ -0,0 +1,20 @@
+# «Похожие книги»: списки соседей считаются фоновой задачей после синхронизации
+
+# Сколько похожих книг хранить и показывать для каждой книги
+SIMILAR_LIMIT = 5
+
+# Минимальный скор похожести (0..100), ниже которого книга не считается похожей
+SIMILAR_MIN_SCORE = 50
+
+# Скор = TITLE_WEIGHT * похожесть названий + AUTHOR_WEIGHT * похожесть авторов
+#        + GENRE_BONUS, если жанр совпадает
+SIMILAR_TITLE_WEIGHT = 0.4
+SIMILAR_AUTHOR_WEIGHT = 0.4
+SIMILAR_GENRE_BONUS = 20
+
+# Сколько книг обрабатывать за один вызов process.cdist
+# (память под матрицу: CHUNK_SIZE * число книг * 4 байта)
+SIMILAR_CHUNK_SIZE = 256
+
+# Потоки RapidFuzz для process.cdist (-1 — все ядра)
+SIMILAR_WORKERS = -1
@@ -0,0 +1,14 @@
+# Счётчики просмотров, скачиваний и вопросов по книгам копятся в памяти
+# и сбрасываются в таблицу book_stats раз в STATS_FLUSH_INTERVAL секунд
+STATS_FLUSH_INTERVAL = 60
+
+# Сколько книг обновлять в БД одним запросом
+STATS_FLUSH_BATCH_SIZE = 500
+
+# Сколько книг показывать в разделе «Популярное»
+POPULAR_LIMIT = 10
+
+# Веса счётчиков в рейтинге популярности
+POPULAR_VIEW_WEIGHT = 1
+POPULAR_DOWNLOAD_WEIGHT = 3
+POPULAR_QUESTION_WEIGHT = 2
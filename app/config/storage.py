@@ -4,6 +4,13 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 
 BOOKS_DIR_STORAGE = BASE_DIR / "storage" / "books"
 
+# Дополнительные корни хранилища (например, тома на других дисках) с той же
+# структурой <genre_slug>/<Название> - <Автор>.<расширение>. Каталог —
+# объединение BOOKS_DIR_STORAGE и этих корней; если один и тот же путь есть
+# в нескольких корнях, берётся файл из первого. Архивы импортируются
+# в BOOKS_DIR_STORAGE.
+BOOKS_DIR_EXTRA_STORAGES: list[Path] = []
+
 GENRE_MAP = {
     "fantasy": "Фантастика",
     "detective": "Детектив",
@@ -12,3 +19,49 @@ GENRE_MAP = {
     "classic": "Классика",
     "adventure": "Приключения",
 }
+
+
+# Импорт архивов с книгами (zip/tar): сколько новых файлов регистрировать
+# в БД за одну транзакцию
+IMPORT_BATCH_SIZE = 500
+
+# Синхронизация хранилища: True — новые файлы регистрируются пакетно
+# (справочники загружаются в память, изменения пишутся многострочными
+# INSERT ... ON CONFLICT / UPDATE с коммитом на каждую пачку);
+# False — по одному файлу через get_or_create_*
+SYNC_BULK = True
+
+# Сколько строк писать в БД одним запросом (и одной транзакцией) при синхронизации
+SYNC_CHUNK_SIZE = 1000
+
+# Файлы, исчезнувшие с диска, удаляются из каталога при синхронизации.
+# Если исчезло сразу больше этой доли файлов каталога (и не меньше
+# SYNC_PRUNE_MIN_FILES), записи не удаляются: скорее всего, не смонтирован
+# диск хранилища. Удалить их можно явно командой /prune.
+SYNC_PRUNE_MAX_FRACTION = 0.2
+SYNC_PRUNE_MIN_FILES = 50
+
+# Обход хранилища: число потоков (задача — каталог верхнего уровня, то есть
+# жанр, во всех корнях) и сколько пачек по SYNC_CHUNK_SIZE файлов может
+# ждать записи в БД, прежде чем потоки обхода остановятся
+SYNC_SCAN_WORKERS = 8
+SYNC_SCAN_QUEUE_SIZE = 4
+
+# Наблюдение за хранилищем во время работы бота: новые, переименованные
+# и удалённые файлы попадают в каталог без перезапуска
+WATCH_STORAGE = True
+
+# Изменения копятся столько секунд после последнего события и применяются
+# одной пачкой (распаковка архива или копирование папки — одна синхронизация)
+WATCH_DEBOUNCE_SECONDS = 2.0
+
+# Но не дольше WATCH_MAX_BATCH_SECONDS от первого события: при непрерывных
+# изменениях пачка применяется принудительно, чтобы каталог не отставал
+WATCH_MAX_BATCH_SECONDS = 60.0
+
+# События файловой системы (inotify и аналоги) берутся через пакет watchfiles;
+# если он не установлен или WATCH_FORCE_POLLING = True (например, хранилище
+# на сетевом диске, где inotify не видит чужих изменений), хранилище
+# опрашивается раз в WATCH_POLL_INTERVAL секунд
+WATCH_FORCE_POLLING = False
+WATCH_POLL_INTERVAL = 30.0
@@ -0,0 +1,10 @@
+# Очередь отправки файлов пользователям (answer_document с загрузкой файла)
+
+# Сколько загрузок файлов в Telegram идёт одновременно на весь бот
+UPLOAD_CONCURRENCY = 4
+
+# Как часто (в секундах) обновлять позицию в очереди в статусном сообщении
+UPLOAD_POSITION_UPDATE_INTERVAL = 3.0
+
+# Сколько последних времён ожидания хранить для метрик (p50/p95)
+UPLOAD_WAIT_SAMPLES = 1000
@@ -0,0 +1,96 @@
+import html
+import tempfile
+from pathlib import Path
+
+from aiogram import Bot, F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from app.config.bot import ADMIN_IDS
+from app.services.book_import import import_archive, import_report
+from app.services.delivery import schedule_delivery_variants
+from app.services.file_sync import prune_orphans, prune_report
+from app.services.similar import schedule_similar_refresh
+from app.services.upload_queue import get_upload_queue_stats
+from app.texts import (
+    IMPORT_FAILED,
+    IMPORT_IN_PROGRESS,
+    IMPORT_USAGE,
+    PRUNE_FAILED,
+    PRUNE_IN_PROGRESS,
+    PRUNE_USAGE,
+    UPLOAD_QUEUE_STATS,
+)
+
+router = Router()
+# Служебные команды доступны только администраторам из ADMIN_IDS
+router.message.filter(F.from_user.id.in_(ADMIN_IDS))
+
+
+@router.message(Command("import"))
+async def on_import(message: Message, command: CommandObject, bot: Bot) -> None:
+    """
+    Импорт архива с книгами в хранилище.
+
+    Варианты:
+      - архив прислан документом с подписью "/import";
+      - "/import <путь>" — архив уже лежит на сервере (для больших архивов,
+        которые нельзя скачать через Bot API).
+    """
+    if message.document is None and not command.args:
+        await message.answer(IMPORT_USAGE)
+        return
+
+    status_message = await message.answer(IMPORT_IN_PROGRESS)
+    try:
+        if message.document is not None:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                archive_path = Path(tmp_dir) / "archive"
+                await bot.download(message.document, destination=archive_path)
+                stats = await import_archive(archive_path)
+        else:
+            stats = await import_archive(Path(command.args.strip()))
+    except Exception as e:
+        await status_message.edit_text(IMPORT_FAILED.format(error=html.escape(str(e))))
+        return
+
+    await status_message.edit_text(import_report(stats))
+    if stats.files:
+        schedule_delivery_variants()
+        schedule_similar_refresh()
+
+
+@router.message(Command("prune"))
+async def on_prune(message: Message, command: CommandObject) -> None:
+    """
+    Удаление из каталога файлов, которых нет в хранилище, и опустевших
+    книг и жанров.
+
+    Варианты:
+      - "/prune" — пробный запуск: только отчёт, что будет удалено;
+      - "/prune apply" — удалить (если исчезло не слишком много файлов);
+      - "/prune force" — удалить без проверки доли исчезнувших файлов.
+    """
+    mode = (command.args or "").strip()
+    if mode not in ("", "apply", "force"):
+        await message.answer(PRUNE_USAGE)
+        return
+
+    status_message = await message.answer(PRUNE_IN_PROGRESS)
+    try:
+        report = await prune_orphans(dry_run=not mode, force=mode == "force")
+    except Exception as e:
+        await status_message.edit_text(PRUNE_FAILED.format(error=html.escape(str(e))))
+        return
+
+    await status_message.edit_text(prune_report(report))
+    if report.pruned and report.books:
+        schedule_similar_refresh()
+
+
+@router.message(Command("stats"))
+async def on_stats(message: Message) -> None:
+    """
+    Метрики очереди отправки файлов: глубина очереди и время ожидания.
+    """
+    await message.answer(UPLOAD_QUEUE_STATS.format(**get_upload_queue_stats()))
@@ -1,17 +1,25 @@
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery, FSInputFile
 
-from app.keyboards.catalog import catalog_format_keyboard
-from app.keyboards.search import search_format_keyboard
-from app.services.book import get_book_file_path, get_book_name
+from app.keyboards.catalog import catalog_format_keyboard, popular_format_keyboard
+from app.keyboards.search import search_format_keyboard, similar_books_keyboard
+from app.services.book import book_card_name, get_book_card, set_telegram_file_id
+from app.services.delivery import get_delivery_file
+from app.services.fs_watcher import schedule_path_sync
+from app.services.similar import get_similar_books
+from app.services.stats import record_download, record_view
+from app.services.upload_queue import upload_slot
 
-from ..config.storage import BOOKS_DIR_STORAGE
 from ..texts import (
     BOOK_SELECT_FORMAT,
     BOOK_DOWNLOAD_ERROR_DATA_NOT_FOUND,
     BOOK_DOWNLOAD_ERROR_FILE_NOT_FOUND,
     BOOK_READY_CAPTION,
     BOOK_SENDING_IN_PROGRESS,
+    BOOK_SENDING_QUEUED,
+    BOOK_NO_SIMILAR,
+    BOOK_SIMILAR,
 )
 
 router = Router()
@@ -25,8 +33,10 @@ async def on_download(callback: CallbackQuery):
     Ожидаемый формат callback_data:
         "download:{book_id}:format:{format}"
 
-    По id файла и формату находит путь в БД, собирает полный путь
-    на диске и отправляет документ пользователю.
+    По карточке книги находит файл нужного формата и отправляет его
+    пользователю. Если файл уже отправлялся, используется сохранённый
+    Telegram file_id; иначе файл загружается с диска, а полученный file_id
+    запоминается для следующих отправок.
     """
     try:
         callback_data_parts = callback.data.split(":")
@@ -36,14 +46,12 @@ async def on_download(callback: CallbackQuery):
         await callback.answer(BOOK_DOWNLOAD_ERROR_DATA_NOT_FOUND, show_alert=True)
         return
 
-    file_path = await get_book_file_path(book_id, book_format)
-    if file_path is None:
+    card = await get_book_card(book_id)
+    book_file = card.file(book_format) if card is not None else None
+    if book_file is None:
         await callback.answer(BOOK_DOWNLOAD_ERROR_FILE_NOT_FOUND, show_alert=True)
         return
 
-    full_path = BOOKS_DIR_STORAGE / file_path
-    file = FSInputFile(full_path, filename=full_path.name)
-
     try:
         await callback.message.delete()
     except Exception:
@@ -55,12 +63,52 @@ async def on_download(callback: CallbackQuery):
     except Exception:
         pass
 
-    book_name = await get_book_name(book_id)
+    # Отвечаем на callback сразу: ожидание в очереди может быть дольше,
+    # чем Telegram ждёт ответа на нажатие кнопки
+    await callback.answer()
+
+    caption = BOOK_READY_CAPTION.format(book_name=book_card_name(card))
     try:
-        await callback.message.answer_document(
-            file,
-            caption=BOOK_READY_CAPTION.format(book_name=book_name),
-        )
+        sent = None
+        if book_file.telegram_file_id:
+            # Файл уже загружался в Telegram — отправляем по file_id без загрузки
+            try:
+                sent = await callback.message.answer_document(
+                    book_file.telegram_file_id,
+                    caption=caption,
+                )
+            except TelegramBadRequest:
+                # Telegram больше не принимает этот file_id — загрузим файл заново
+                await set_telegram_file_id(book_id, book_format, None)
+
+        if sent is None:
+            async def show_position(position: int) -> None:
+                if status_message is None:
+                    return
+                try:
+                    await status_message.edit_text(BOOK_SENDING_QUEUED.format(ahead=position - 1))
+                except Exception:
+                    pass
+
+            # Сжатый вариант файла, если он есть, иначе сам файл
+            send_path, filename = get_delivery_file(card.file_path(book_format))
+            if not send_path.exists():
+                # Файл удалили с диска после синхронизации — убираем его из каталога
+                # в фоне, не дожидаясь идущей синхронизации или импорта
+                schedule_path_sync([book_file.path])
+                await callback.message.answer(BOOK_DOWNLOAD_ERROR_FILE_NOT_FOUND)
+                return
+
+            # Загрузка файла в Telegram — через общую очередь с лимитом одновременных отправок
+            async with upload_slot(callback.from_user.id, show_position):
+                sent = await callback.message.answer_document(
+                    FSInputFile(send_path, filename=filename),
+                    caption=caption,
+                )
+            if sent.document is not None:
+                await set_telegram_file_id(book_id, book_format, sent.document.file_id)
+
+        record_download(book_id)
     finally:
         if status_message is not None:
             try:
@@ -68,8 +116,6 @@ async def on_download(callback: CallbackQuery):
             except Exception:
                 pass
 
-    await callback.answer()
-
 
 @router.callback_query(F.data.regexp(r"book:\d+:genre:\d+:page:\d+$"))
 async def on_catalog_book_chosen(callback: CallbackQuery):
@@ -87,6 +133,7 @@ async def on_catalog_book_chosen(callback: CallbackQuery):
     genre_id = int(callback_data_parts[3])
     page = int(callback_data_parts[5])
 
+    record_view(book_id)
     await callback.message.edit_text(
         BOOK_SELECT_FORMAT,
         reply_markup=await catalog_format_keyboard(book_id, genre_id, page),
@@ -109,9 +156,58 @@ async def on_search_book_chosen(callback: CallbackQuery):
     callback_data_parts = callback.data.split(":")
     book_id = int(callback_data_parts[1])
 
+    record_view(book_id)
     await callback.message.edit_text(
         BOOK_SELECT_FORMAT,
         reply_markup=await search_format_keyboard(book_id),
     )
 
     await callback.answer()
+
+
+@router.callback_query(F.data.regexp(r"^book:\d+:popular$"))
+async def on_popular_book_chosen(callback: CallbackQuery):
+    """
+    Обработчик выбора книги из раздела «Популярное».
+
+    Ожидаемый формат callback_data:
+        "book:{book_id}:popular"
+
+    Показывает пользователю клавиатуру с доступными форматами
+    (fb2/pdf и т.п.) для выбранной книги.
+    """
+    book_id = int(callback.data.split(":")[1])
+
+    record_view(book_id)
+    await callback.message.edit_text(
+        BOOK_SELECT_FORMAT,
+        reply_markup=await popular_format_keyboard(book_id),
+    )
+
+    await callback.answer()
+
+
+@router.callback_query(F.data.regexp(r"^similar:\d+$"))
+async def on_similar_books(callback: CallbackQuery):
+    """
+    Обработчик кнопки «Похожие книги».
+
+    Ожидаемый формат callback_data:
+        "similar:{book_id}"
+
+    Показывает заранее посчитанный список похожих книг
+    (см. services.similar.refresh_similar_books).
+    """
+    book_id = int(callback.data.split(":")[1])
+
+    books = await get_similar_books(book_id)
+    if books:
+        text = BOOK_SIMILAR.format(book_name=book_card_name(await get_book_card(book_id)))
+    else:
+        text = BOOK_NO_SIMILAR
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=similar_books_keyboard(book_id, books),
+    )
+    await callback.answer()
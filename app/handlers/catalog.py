@@ -1,14 +1,18 @@
 from aiogram import F, Router
 from aiogram.types import CallbackQuery, Message
 
-from app.keyboards.catalog import books_catalog_keyboard, genres_keyboard
+from app.keyboards.catalog import books_catalog_keyboard, genres_keyboard, popular_keyboard
 from app.keyboards.main_menu import back_to_main_menu
 from app.services.catalog import get_all_genres, get_books_page_by_genre
+from app.services.catalog_version import get_catalog_version
+from app.services.stats import get_popular_books
 
 from ..texts import (
     CATALOG_CHOOSE_GENRE,
     CATALOG_NO_BOOKS,
     CATALOG_NO_GENRES,
+    CATALOG_NO_POPULAR,
+    CATALOG_POPULAR,
     CATALOG_CURRENT_GENRE,
     CATALOG_WELCOME,
     BUTTON_MENU_CATALOG,
@@ -26,6 +30,8 @@ async def catalog_entery(message: Message):
     Загружает список жанров из БД и показывает пользователю
     клавиатуру с жанрами. Если жанров нет, выводит соответствующее сообщение.
     """
+    # Поколение до чтения: клавиатура по устаревшим данным не кэшируется
+    version = get_catalog_version()
     genres = await get_all_genres()
 
     if not genres:
@@ -39,7 +45,7 @@ async def catalog_entery(message: Message):
 
     await message.answer(
         CATALOG_CHOOSE_GENRE,
-        reply_markup=genres_keyboard(genres),
+        reply_markup=genres_keyboard(genres, version),
     )
 
 
@@ -63,6 +69,7 @@ async def on_genre_chosen(callback: CallbackQuery):
         return
     
     # Получаем книги для выбранного жанра и страницы
+    version = get_catalog_version()
     books, total_pages = await get_books_page_by_genre(genre_id, page_id)
 
     if not books:
@@ -72,7 +79,7 @@ async def on_genre_chosen(callback: CallbackQuery):
 
     await callback.message.edit_text(
         CATALOG_CURRENT_GENRE,
-        reply_markup=books_catalog_keyboard(books, genre_id, page_id, total_pages),
+        reply_markup=books_catalog_keyboard(books, genre_id, page_id, total_pages, version),
     )
     await callback.answer()
 
@@ -84,6 +91,8 @@ async def on_back_to_genres(callback: CallbackQuery):
     Снова загружает список жанров и заменяет сообщение со списком книг
     на сообщение со списком жанров.
     """
+    # Поколение до чтения: клавиатура по устаревшим данным не кэшируется
+    version = get_catalog_version()
     genres = await get_all_genres()
 
     # Если жанры были удалены
@@ -94,6 +103,23 @@ async def on_back_to_genres(callback: CallbackQuery):
 
     await callback.message.edit_text(
         CATALOG_CHOOSE_GENRE,
-        reply_markup=genres_keyboard(genres),
+        reply_markup=genres_keyboard(genres, version),
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "popular")
+async def on_popular(callback: CallbackQuery):
+    """
+    Обработчик кнопки «🔥 Популярное».
+
+    Показывает заранее посчитанный список самых популярных книг
+    (по просмотрам, скачиваниям и вопросам нейросети).
+    """
+    books = await get_popular_books()
+
+    await callback.message.edit_text(
+        CATALOG_POPULAR if books else CATALOG_NO_POPULAR,
+        reply_markup=popular_keyboard(books),
     )
     await callback.answer()
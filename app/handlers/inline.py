@@ -0,0 +1,110 @@
+import asyncio
+
+from aiogram import F, Router
+from aiogram.filters import CommandObject, CommandStart
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Message,
+)
+from aiogram.utils.deep_linking import create_start_link
+
+from app.config.search import INLINE_DEBOUNCE_SECONDS, INLINE_SEARCH_LIMIT
+from app.keyboards.search import search_format_keyboard
+from app.services.search import search_books_as_you_type
+from app.services.stats import record_view
+from app.texts import (
+    BOOK_NAME,
+    BOOK_SELECT_FORMAT,
+    KEYBOARD_OPEN_BOOK,
+)
+
+router = Router()
+
+# Текущая (ещё не ответившая) задача поиска для каждого пользователя
+_pending: dict[int, asyncio.Task] = {}
+
+
+async def _answer_inline_query(inline_query: InlineQuery) -> None:
+    """
+    Ждёт паузу в наборе, ищет книги и отвечает списком результатов.
+
+    Каждый результат — сообщение с названием книги и кнопкой, которая
+    открывает бота с клавиатурой выбора формата этой книги.
+    """
+    await asyncio.sleep(INLINE_DEBOUNCE_SECONDS)
+
+    books = await search_books_as_you_type(
+        inline_query.from_user.id,
+        inline_query.query,
+        limit=INLINE_SEARCH_LIMIT,
+    )
+
+    results = []
+    for book in books:
+        book_name = BOOK_NAME.format(title=book.title, author=book.author)
+        link = await create_start_link(inline_query.bot, f"book_{book.id}")
+        results.append(
+            InlineQueryResultArticle(
+                id=str(book.id),
+                title=book.title,
+                description=book.author,
+                input_message_content=InputTextMessageContent(message_text=book_name),
+                reply_markup=InlineKeyboardMarkup(
+                    inline_keyboard=[[InlineKeyboardButton(text=KEYBOARD_OPEN_BOOK, url=link)]]
+                ),
+            )
+        )
+
+    await inline_query.answer(results, is_personal=True, cache_time=60)
+
+
+@router.inline_query()
+async def on_inline_query(inline_query: InlineQuery) -> None:
+    """
+    Обработчик inline-запросов "@bot <текст>".
+
+    Telegram присылает запрос на каждое нажатие клавиши, поэтому:
+      - поиск стартует только после паузы INLINE_DEBOUNCE_SECONDS;
+      - новый запрос пользователя отменяет его предыдущую, ещё не ответившую задачу.
+    """
+    user_id = inline_query.from_user.id
+
+    previous = _pending.pop(user_id, None)
+    if previous is not None:
+        previous.cancel()
+
+    task = asyncio.create_task(_answer_inline_query(inline_query))
+    _pending[user_id] = task
+    try:
+        await task
+    except asyncio.CancelledError:
+        # Задачу вытеснил более новый запрос — отвечать на старый не нужно.
+        # Если же отменили сам обработчик, пробрасываем отмену дальше.
+        if not task.cancelled():
+            raise
+    finally:
+        if _pending.get(user_id) is task:
+            del _pending[user_id]
+
+
+@router.message(CommandStart(deep_link=True, magic=F.args.regexp(r"^book_\d+$")))
+async def on_inline_book_opened(message: Message, command: CommandObject) -> None:
+    """
+    Обработчик перехода по кнопке из inline-результата.
+
+    Ожидаемый формат команды:
+        "/start book_{book_id}"
+
+    Показывает пользователю клавиатуру с доступными форматами книги.
+    """
+    book_id = int(command.args.split("_", 1)[1])
+
+    record_view(book_id)
+    await message.answer(
+        BOOK_SELECT_FORMAT,
+        reply_markup=await search_format_keyboard(book_id),
+    )
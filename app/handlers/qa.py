@@ -2,10 +2,11 @@ from aiogram import F, Router
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
-from app.keyboards.catalog import catalog_format_keyboard
+from app.keyboards.catalog import catalog_format_keyboard, popular_format_keyboard
 from app.keyboards.search import search_format_keyboard
-from app.services.book import get_book_name
+from app.services.book import book_card_name, get_book_card
 from app.services.llm import LLMError, ask_book_question
+from app.services.stats import record_question
 from app.services.user_limit import (
     DAILY_LIMIT,
     check_daily_limit,
@@ -40,6 +41,8 @@ async def _build_format_keyboard(
         return None
     if source == "search":
         return await search_format_keyboard(book_id)
+    if source == "popular":
+        return await popular_format_keyboard(book_id)
     if source == "catalog" and genre_id is not None and page is not None:
         return await catalog_format_keyboard(book_id, genre_id, page)
     return None
@@ -150,7 +153,7 @@ async def receive_question(message: Message, state: FSMContext):
             await state.clear()
             return
 
-        book_name = await get_book_name(book_id)
+        book_name = book_card_name(await get_book_card(book_id))
         try:
             answer = await ask_book_question(book_name, text)
         except LLMError:
@@ -161,6 +164,7 @@ async def receive_question(message: Message, state: FSMContext):
             await state.clear()
             return
 
+        record_question(book_id)
         keyboard = await _build_format_keyboard(source, book_id, genre_id, page)
         await state.clear()
 
@@ -4,7 +4,7 @@ from aiogram.types import CallbackQuery, Message
 
 from app.keyboards.main_menu import back_to_main_menu, main_menu_keyboard
 from app.keyboards.search import books_search_keyboard
-from app.services.search import search_books
+from app.services.search import get_search_page, start_search_pages
 from app.states.search import SearchState
 from app.texts import (
     START_MESSAGE,
@@ -14,6 +14,7 @@ from app.texts import (
     SEARCH_EMPTY_QUERY,
     SEARCH_NO_RESULTS,
     SEARCH_RESULT,
+    SEARCH_RESULTS_EXPIRED,
 )
 
 router = Router()
@@ -55,7 +56,7 @@ async def handle_search_query(message: Message, state: FSMContext) -> None:
         await message.answer(SEARCH_EMPTY_QUERY)
         return
 
-    books = await search_books(query)
+    handle, books, total_pages = await start_search_pages(message.from_user.id, query)
 
     await state.clear()
 
@@ -70,10 +71,36 @@ async def handle_search_query(message: Message, state: FSMContext) -> None:
 
     await message.answer(
         SEARCH_RESULT.format(query=query),
-        reply_markup=books_search_keyboard(books),
+        reply_markup=books_search_keyboard(books, handle, 1, total_pages),
     )
 
 
+@router.callback_query(F.data.regexp(r"^spage:[0-9a-z]+:\d+$"))
+async def on_search_page(callback: CallbackQuery) -> None:
+    """
+    Обработчик листания результатов поиска.
+
+    Ожидаемый формат callback_data:
+        "spage:{handle}:{page}"
+
+    Страница нарезается из сохранённого ранжирования без повторного поиска.
+    Если ранжирование устарело — просит повторить запрос.
+    """
+    _, handle, page_raw = callback.data.split(":")
+
+    result = await get_search_page(callback.from_user.id, handle, int(page_raw))
+    if result is None:
+        await callback.answer(SEARCH_RESULTS_EXPIRED, show_alert=True)
+        return
+
+    query, books, page, total_pages = result
+    await callback.message.edit_text(
+        SEARCH_RESULT.format(query=query),
+        reply_markup=books_search_keyboard(books, handle, page, total_pages),
+    )
+    await callback.answer()
+
+
 @router.callback_query(F.data == "back:search")
 async def on_back_to_search(callback: CallbackQuery, state: FSMContext) -> None:
     """
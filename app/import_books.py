@@ -0,0 +1,27 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.services.book_import import import_archive, import_report
+from app.services.delivery import build_delivery_variants
+from app.services.similar import refresh_similar_books
+
+from .models.db import init_db
+
+
+async def main(archives: list[Path]) -> None:
+    await init_db()
+    for archive_path in archives:
+        print(f"Импорт {archive_path}…")
+        stats = await import_archive(archive_path)
+        print(import_report(stats))
+    await build_delivery_variants()
+    await refresh_similar_books()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Импорт zip/tar архивов с книгами <genre>/<Название> - <Автор>.<ext> в хранилище",
+    )
+    parser.add_argument("archives", nargs="+", type=Path, help="пути к архивам")
+    asyncio.run(main(parser.parse_args().archives))
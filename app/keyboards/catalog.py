@@ -1,7 +1,10 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from ..models.book import Book, Genre
-from ..services.book import get_book_files
+from ..config.catalog import CATALOG_KEYBOARDS_CACHE_SIZE
+from ..models.records import BookRecord, GenreRecord
+from ..services.book import get_book_card
+from ..services.cache import TTLCache
+from ..services.catalog_version import get_catalog_version
 
 from ..texts import (
     KEYBOARD_BACK_TO_GENRE,
@@ -11,19 +14,58 @@ from ..texts import (
     KEYBOARD_NO_FILES,
     KEYBOARD_BOOK_NAME,
     KEYBOARD_AI_QA,
+    KEYBOARD_POPULAR,
+    KEYBOARD_SIMILAR,
 )
 
+# Готовые клавиатуры каталога. Для заданного жанра и страницы клавиатура одна
+# и та же, пока каталог не изменится, поэтому ключ — (вид, параметры),
+# а при смене поколения каталога кэш очищается целиком.
+_keyboards: TTLCache = TTLCache(maxsize=CATALOG_KEYBOARDS_CACHE_SIZE)
 
-def genres_keyboard(genres: list[Genre]) -> InlineKeyboardMarkup:
+
+def get_keyboards_cache_stats() -> dict:
+    """
+    Счётчики кэша клавиатур каталога (size/hits/misses/hit_rate).
+    """
+    return _keyboards.stats()
+
+
+def genres_keyboard(genres: list[GenreRecord], version: int) -> InlineKeyboardMarkup:
     """
     Клавиатура со списком жанров.
 
+    Первой идёт кнопка раздела «Популярное»:
+        "popular"
     Для каждого жанра создаётся отдельная кнопка:
         "genre:{genre_id}:page:1"
 
     Страница всегда начинается с 1, дальше пагинацией управляет books_keyboard.
+    Готовая клавиатура кэшируется до следующего изменения каталога.
+
+    version — поколение каталога, взятое до чтения genres: если каталог
+    успел измениться, список мог устареть, и клавиатура не кэшируется.
     """
-    keyboard: list[list[InlineKeyboardButton]] = []
+    _keyboards.ensure_version(get_catalog_version())
+    cached = _keyboards.get(("genres",))
+    if cached is not None:
+        return cached
+
+    markup = _build_genres_keyboard(genres)
+    if version == get_catalog_version():
+        _keyboards.set(("genres",), markup)
+    return markup
+
+
+def _build_genres_keyboard(genres: list[GenreRecord]) -> InlineKeyboardMarkup:
+    keyboard: list[list[InlineKeyboardButton]] = [
+        [
+            InlineKeyboardButton(
+                text=KEYBOARD_POPULAR,
+                callback_data="popular"
+            )
+        ]
+    ]
     for genre in genres:
         keyboard.append(
             [
@@ -47,15 +89,45 @@ async def catalog_format_keyboard(
     - callback_data кнопок формата имеет вид:
         "download:{book_id}:format:{format}"
       и обрабатывается в on_download.
+    - Кнопка «Похожие книги» открывает список похожих книг:
+        "similar:{book_id}"
     - Предпоследняя кнопка позволяет задать вопрос по книге нейросети:
         "qa:catalog:{book_id}:{genre_id}:{page}"
     - Внизу добавляется кнопка "Назад" для возврата к списку книг
       того же жанра и страницы:
         "genre:{genre_id}:page:{page}"
     """
+    return await _build_format_keyboard(
+        book_id,
+        qa_callback_data=f"qa:catalog:{book_id}:{genre_id}:{page}",
+        back_callback_data=f"genre:{genre_id}:page:{page}",
+    )
+
+
+async def popular_format_keyboard(book_id: int) -> InlineKeyboardMarkup:
+    """
+    Клавиатура с форматами файлов для книги из раздела «Популярное».
+
+    Устроена как catalog_format_keyboard, но вопрос нейросети
+    ("qa:popular:{book_id}") и кнопка "Назад" ("popular") возвращают
+    к списку популярных книг.
+    """
+    return await _build_format_keyboard(
+        book_id,
+        qa_callback_data=f"qa:popular:{book_id}",
+        back_callback_data="popular",
+    )
+
+
+async def _build_format_keyboard(
+    book_id: int,
+    qa_callback_data: str,
+    back_callback_data: str,
+) -> InlineKeyboardMarkup:
     keyboard: list[list[InlineKeyboardButton]] = []
     
-    book_files = await get_book_files(book_id)
+    card = await get_book_card(book_id)
+    book_files = card.files if card is not None else ()
     if len(book_files) == 0:
         keyboard.append(
             [
@@ -75,11 +147,19 @@ async def catalog_format_keyboard(
                     )
                 ]
             )
+    keyboard.append(
+        [
+            InlineKeyboardButton(
+                text=KEYBOARD_SIMILAR,
+                callback_data=f"similar:{book_id}"
+            )
+        ]
+    )
     keyboard.append(
         [
             InlineKeyboardButton(
                 text=KEYBOARD_AI_QA,
-                callback_data=f"qa:catalog:{book_id}:{genre_id}:{page}"
+                callback_data=qa_callback_data
             )
         ]
     )
@@ -87,7 +167,37 @@ async def catalog_format_keyboard(
         [
             InlineKeyboardButton(
                 text=KEYBOARD_PREV,
-                callback_data=f"genre:{genre_id}:page:{page}"
+                callback_data=back_callback_data
+            )
+        ]
+    )
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def popular_keyboard(books: list[BookRecord]) -> InlineKeyboardMarkup:
+    """
+    Клавиатура раздела «Популярное».
+
+    - Каждая книга -> отдельная кнопка:
+        "book:{book_id}:popular"
+    - Внизу — кнопка "⬅️ К жанрам" для возврата к списку жанров.
+    """
+    keyboard: list[list[InlineKeyboardButton]] = []
+    for book in books:
+        keyboard.append(
+            [
+                InlineKeyboardButton(
+                    text=KEYBOARD_BOOK_NAME.format(title=book.title, author=book.author),
+                    callback_data=f"book:{book.id}:popular"
+                )
+            ]
+        )
+    keyboard.append(
+        [
+            InlineKeyboardButton(
+                text=KEYBOARD_BACK_TO_GENRE,
+                callback_data="back:genres"
             )
         ]
     )
@@ -95,12 +205,12 @@ async def catalog_format_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 def books_catalog_keyboard(
-    books: list[Book],
+    books: list[BookRecord],
     genre_id: int,
     page: int,
     total_pages: int,
+    version: int,
 ) -> InlineKeyboardMarkup:
-    keyboard: list[list[InlineKeyboardButton]] = []
     """
     Клавиатура со списком книг конкретного жанра + элементы пагинации.
 
@@ -115,7 +225,30 @@ def books_catalog_keyboard(
         "genre:{genre_id}:page:{page-1}" / "genre:{genre_id}:page:{page+1}"
 
     - Ещё ниже — кнопка "⬅️ К жанрам" для возврата к списку жанров.
+
+    Книги страницы однозначно определяются (genre_id, page) в пределах
+    поколения каталога, поэтому готовая клавиатура кэшируется по этому ключу —
+    если version (поколение, взятое до чтения books) всё ещё текущее.
     """
+    _keyboards.ensure_version(get_catalog_version())
+    cache_key = ("books", genre_id, page, total_pages)
+    cached = _keyboards.get(cache_key)
+    if cached is not None:
+        return cached
+
+    markup = _build_books_catalog_keyboard(books, genre_id, page, total_pages)
+    if version == get_catalog_version():
+        _keyboards.set(cache_key, markup)
+    return markup
+
+
+def _build_books_catalog_keyboard(
+    books: list[BookRecord],
+    genre_id: int,
+    page: int,
+    total_pages: int,
+) -> InlineKeyboardMarkup:
+    keyboard: list[list[InlineKeyboardButton]] = []
     for book in books:
         keyboard.append(
             [
@@ -1,22 +1,37 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from ..models.book import Book
-from ..services.book import get_book_files
+from ..models.records import BookRecord
+from ..services.book import get_book_card
 
 from ..texts import (
     KEYBOARD_BACK_TO_SEARCH,
     KEYBOARD_BOOK_NAME,
+    KEYBOARD_NEXT,
     KEYBOARD_NO_FILES,
+    KEYBOARD_PAGES,
+    KEYBOARD_PREV,
     KEYBOARD_AI_QA,
+    KEYBOARD_BACK_TO_BOOK,
+    KEYBOARD_SIMILAR,
 )
 
 
-def books_search_keyboard(books: list[Book]) -> InlineKeyboardMarkup:
+def books_search_keyboard(
+    books: list[BookRecord],
+    handle: str | None = None,
+    page: int = 1,
+    total_pages: int = 1,
+) -> InlineKeyboardMarkup:
     """
     Клавиатура с результатами поиска.
 
     Каждая книга -> кнопка:
         "book:{book_id}"
+
+    Если результатов больше, чем на одну страницу, добавляется ряд с пагинацией:
+        [ "⬅️ Назад", "{page}/{total_pages}", "Вперёд ➡️" ]
+    Кнопки листания ссылаются на сохранённое ранжирование по его handle:
+        "spage:{handle}:{page}"
     """
     keyboard: list[list[InlineKeyboardButton]] = []
     
@@ -29,6 +44,34 @@ def books_search_keyboard(books: list[Book]) -> InlineKeyboardMarkup:
                 )
             ]
         )
+
+    if handle is not None and total_pages > 1:
+        nav_row: list[InlineKeyboardButton] = []
+
+        if page > 1:
+            nav_row.append(
+                InlineKeyboardButton(
+                    text=KEYBOARD_PREV,
+                    callback_data=f"spage:{handle}:{page - 1}"
+                )
+            )
+
+        nav_row.append(
+            InlineKeyboardButton(
+                text=KEYBOARD_PAGES.format(page=page, total_pages=total_pages),
+                callback_data="noop"
+            )
+        )
+
+        if page < total_pages:
+            nav_row.append(
+                InlineKeyboardButton(
+                    text=KEYBOARD_NEXT,
+                    callback_data=f"spage:{handle}:{page + 1}"
+                )
+            )
+
+        keyboard.append(nav_row)
     
     keyboard.append(
         [
@@ -49,6 +92,8 @@ async def search_format_keyboard(book_id: int) -> InlineKeyboardMarkup:
     - callback_data кнопок формата имеет вид:
         "download:{book_id}:format:{format}"
       и обрабатывается в on_download.
+    - Кнопка «Похожие книги» открывает список похожих книг:
+        "similar:{book_id}"
     - Предпоследняя кнопка позволяет задать вопрос по книге нейросети:
         "qa:search:{book_id}"
     - Внизу добавляется кнопка "Назад" для возврата к поиску:
@@ -56,7 +101,8 @@ async def search_format_keyboard(book_id: int) -> InlineKeyboardMarkup:
     """
     keyboard: list[list[InlineKeyboardButton]] = []
     
-    book_files = await get_book_files(book_id)
+    card = await get_book_card(book_id)
+    book_files = card.files if card is not None else ()
     if len(book_files) == 0:
         keyboard.append(
             [
@@ -76,6 +122,14 @@ async def search_format_keyboard(book_id: int) -> InlineKeyboardMarkup:
                     )
                 ]
             )
+    keyboard.append(
+        [
+            InlineKeyboardButton(
+                text=KEYBOARD_SIMILAR,
+                callback_data=f"similar:{book_id}"
+            )
+        ]
+    )
     keyboard.append(
         [
             InlineKeyboardButton(
@@ -94,3 +148,35 @@ async def search_format_keyboard(book_id: int) -> InlineKeyboardMarkup:
     )
 
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def similar_books_keyboard(book_id: int, books: list[BookRecord]) -> InlineKeyboardMarkup:
+    """
+    Клавиатура со списком похожих книг.
+
+    - Каждая книга -> кнопка:
+        "book:{similar_id}"
+      (открывается так же, как книга из поиска).
+    - Внизу — кнопка возврата к исходной книге:
+        "book:{book_id}"
+    """
+    keyboard: list[list[InlineKeyboardButton]] = []
+    for book in books:
+        keyboard.append(
+            [
+                InlineKeyboardButton(
+                    text=KEYBOARD_BOOK_NAME.format(title=book.title, author=book.author),
+                    callback_data=f"book:{book.id}"
+                )
+            ]
+        )
+    keyboard.append(
+        [
+            InlineKeyboardButton(
+                text=KEYBOARD_BACK_TO_BOOK,
+                callback_data=f"book:{book_id}"
+            )
+        ]
+    )
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
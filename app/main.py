@@ -4,11 +4,20 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
+from app.services.delivery import build_delivery_variants
 from app.services.file_sync import sync_book_from_fs
+from app.services.fs_watcher import start_storage_watcher, stop_storage_watcher
+from app.services.search import init_search_executor, shutdown_search_executor
+from app.services.search_index import build_search_index
+from app.services.similar import schedule_similar_refresh
+from app.services.stats import start_stats_flusher, stop_stats_flusher
 
 from app.config.bot import BOT_TOKEN
+from app.config.search import SEARCH_BACKEND
+from .handlers import admin as admin_handler
 from .handlers import book as book_handler
 from .handlers import catalog as catalog_handler
+from .handlers import inline as inline_handler
 from .handlers import main_menu as main_menu_handler
 from .handlers import search as search_handler
 from .handlers import qa as qa_handler
@@ -19,9 +28,11 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 dp = Dispatcher()
+dp.include_router(admin_handler.router)
 dp.include_router(catalog_handler.router)
 dp.include_router(book_handler.router)
 dp.include_router(search_handler.router)
+dp.include_router(inline_handler.router)
 dp.include_router(main_menu_handler.router)
 dp.include_router(qa_handler.router)
 
@@ -29,11 +40,23 @@ dp.include_router(qa_handler.router)
 async def main():
     await init_db()
     await sync_book_from_fs()
+    await build_delivery_variants()
+    if SEARCH_BACKEND == "trigram":
+        await build_search_index()
+    init_search_executor()
+    start_stats_flusher()
+    # Списки похожих книг досчитываются в фоне, бот уже отвечает
+    schedule_similar_refresh()
+    start_storage_watcher()
     try:
         print("Бот запущен. Нажмите ctrl + c для остановки.")
         await dp.start_polling(bot)
     except Exception as e:
         print(f"Ошибка: {e}")
+    finally:
+        await stop_storage_watcher()
+        await stop_stats_flusher()
+        shutdown_search_executor()
 
 if __name__ == "__main__":
     asyncio.run(main())
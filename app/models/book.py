@@ -1,11 +1,44 @@
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import BigInteger, ForeignKey, Index, String, column, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from .db import Base
 
+
+# Полнотекстовый вектор по названию и автору. Колонка генерируемая и создаётся
+# только в PostgreSQL (см. POSTGRES_SEARCH_DDL), поэтому не входит в маппинг Book,
+# а используется в запросах как отдельное выражение.
+book_search_vector = column("search_vector", TSVECTOR)
+
+
+
+def folded_lower(expr):
+    """
+    SQL-выражение replace(lower(expr), 'ё', 'е') — нижний регистр со свёрнутой "ё",
+    как у нормализованных слов запроса. Литералы вставляются в текст запроса
+    (а не параметрами), чтобы PostgreSQL мог использовать индексы по этому выражению.
+    """
+    return func.replace(func.lower(expr), literal_column("'ё'"), literal_column("'е'"))
+
+
+# DDL для режима поиска "postgres": tsvector-колонка и GIN-индексы pg_trgm.
+# Выражения совпадают с folded_lower(), иначе индексы не будут использоваться.
+# Все операции идемпотентны и выполняются в init_db при каждом старте.
+POSTGRES_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS "
+    "(to_tsvector('simple', replace(lower(coalesce(title, '') || ' ' || coalesce(author, '')), 'ё', 'е'))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_books_search_vector "
+    "ON books USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_books_title_trgm "
+    "ON books USING gin (replace(lower(title), 'ё', 'е') gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_books_author_trgm "
+    "ON books USING gin (replace(lower(author), 'ё', 'е') gin_trgm_ops)",
+)
+
 class Genre(Base):
     __tablename__ = "genres"
 
@@ -43,6 +76,13 @@ class Book(Base):
         cascade="all, delete-orphan"
     )
 
+    # Покрывающий индекс для постраничного вывода жанра по ключу (title, id);
+    # уникальный индекс — ключ книги, по нему синхронизация делает INSERT ... ON CONFLICT
+    __table_args__ = (
+        Index("ix_books_genre_title_id", "genre_id", "title", "id"),
+        Index("ux_books_genre_title_author", "genre_id", "title", "author", unique=True),
+    )
+
     def __repr__(self) -> str:
         return f"Book(id={self.id!r}, title={self.title!r}, author={self.author!r})"
     
@@ -60,9 +100,24 @@ class BookFile(Base):
     format: Mapped[str] = mapped_column(String(10), nullable=False)
     path: Mapped[str] = mapped_column(String(500), nullable=False)
 
+    # Размер, время изменения и inode файла на момент последней синхронизации:
+    # по ним синхронизация пропускает неизменившиеся файлы
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    mtime_ns: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    inode: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+    # file_id документа в Telegram после первой отправки: повторные отправки
+    # идут по нему без загрузки файла. Сбрасывается, если файл изменился.
+    telegram_file_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
     # Связь "много к одному" с Book
     book: Mapped[Book] = relationship(back_populates="files")
 
+    # Одна запись на формат книги
+    __table_args__ = (
+        Index("ux_book_files_book_format", "book_id", "format", unique=True),
+    )
+
     def __repr__(self) -> str:
         return (
             f"BookFile(id={self.id!r}, book_id={self.book_id!r}, "
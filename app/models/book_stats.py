@@ -0,0 +1,27 @@
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .db import Base
+
+
+class BookStats(Base):
+    __tablename__ = "book_stats"
+
+    # Одна строка счётчиков на книгу
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("books.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Открытия клавиатуры форматов книги
+    views: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Отправленные файлы книги
+    downloads: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Вопросы по книге нейросети
+    questions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"BookStats(book_id={self.book_id!r}, views={self.views!r}, "
+            f"downloads={self.downloads!r}, questions={self.questions!r})"
+        )
@@ -1,7 +1,11 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from ..config.bot import DATABASE_URL
+from ..config.search import SEARCH_BACKEND
 
 
 class Base(DeclarativeBase):
@@ -25,13 +29,87 @@ async_session_factory = async_sessionmaker(
 )
 
 
+def insert_on_conflict(
+    table,
+    rows: list[dict],
+    index_elements: list[str],
+    update_columns: tuple = (),
+    add_columns: tuple = (),
+):
+    """
+    Многострочный INSERT с обработкой конфликта по уникальному ключу
+    index_elements в синтаксисе текущей СУБД:
+      - update_columns и add_columns пусты — конфликтующие строки пропускаются
+        (ON CONFLICT DO NOTHING / INSERT IGNORE);
+      - иначе у конфликтующих строк update_columns заменяются новыми
+        значениями, а к add_columns новые значения прибавляются
+        (ON CONFLICT DO UPDATE / ON DUPLICATE KEY UPDATE).
+    """
+    def updates(new_values) -> dict:
+        values = {name: new_values[name] for name in update_columns}
+        values.update({name: table.c[name] + new_values[name] for name in add_columns})
+        return values
+
+    if engine.dialect.name == "mysql":
+        stmt = mysql.insert(table).values(rows)
+        if not update_columns and not add_columns:
+            return stmt.prefix_with("IGNORE")
+        return stmt.on_duplicate_key_update(updates(stmt.inserted))
+
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(table).values(rows)
+    if not update_columns and not add_columns:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_=updates(stmt.excluded),
+    )
+
+
+def _add_missing_columns(sync_conn) -> None:
+    """
+    Добавляет в существующие таблицы nullable-колонки, появившиеся в моделях
+    позже (create_all не изменяет уже созданные таблицы).
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
 async def init_db() -> None:
     """
-    Инициализирует базу данных: создаёт таблицы, если их ещё нет.
+    Инициализирует базу данных: создаёт таблицы, если их ещё нет,
+    а также nullable-колонки и индексы, добавленные в модели уже после
+    создания таблиц.
+
+    В режиме поиска "postgres" на PostgreSQL дополнительно создаёт
+    tsvector-колонку и GIN-индексы для полнотекстового и триграммного поиска.
     """
     # импортируем модели внутри функции, чтобы зарегистрировать метаданные
-    from .book import Genre, Book, BookFile
+    from .book import Genre, Book, BookFile, POSTGRES_SEARCH_DDL
+    from .book_stats import BookStats
+    from .similar_book import SimilarBook, SimilarBookState
     from .user_limit import UserLimit
 
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        # create_all создаёт индексы только вместе с новыми таблицами
+        await conn.run_sync(_create_missing_indexes)
+
+        if SEARCH_BACKEND == "postgres" and conn.dialect.name == "postgresql":
+            for ddl in POSTGRES_SEARCH_DDL:
+                await conn.execute(text(ddl))
\ No newline at end of file
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+
+from .book import Book, BookFile, Genre
+
+
+# Лёгкие read-only записи для путей чтения (поиск, каталог, клавиатуры).
+# Заполняются выборкой отдельных колонок, минуя ORM: без identity map,
+# отслеживания изменений и __dict__ у каждого экземпляра.
+
+
+@dataclass(frozen=True, slots=True)
+class BookRecord:
+    id: int
+    title: str
+    author: str
+
+
+@dataclass(frozen=True, slots=True)
+class GenreRecord:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class BookFileRecord:
+    book_id: int
+    format: str
+    path: str
+    telegram_file_id: str | None = None
+
+
+# Колонки для select(*...) в порядке полей соответствующих записей:
+#   BookRecord(*row), GenreRecord(*row), BookFileRecord(*row)
+BOOK_RECORD_COLUMNS = (Book.id, Book.title, Book.author)
+GENRE_RECORD_COLUMNS = (Genre.id, Genre.name)
+BOOK_FILE_RECORD_COLUMNS = (
+    BookFile.book_id,
+    BookFile.format,
+    BookFile.path,
+    BookFile.telegram_file_id,
+)
@@ -0,0 +1,44 @@
+from sqlalchemy import Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .db import Base
+
+
+class SimilarBook(Base):
+    __tablename__ = "similar_books"
+
+    # Первичный ключ (book_id, rank): список соседей книги читается
+    # одним проходом по индексу в порядке rank
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("books.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    similar_id: Mapped[int] = mapped_column(
+        ForeignKey("books.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"SimilarBook(book_id={self.book_id!r}, rank={self.rank!r}, "
+            f"similar_id={self.similar_id!r}, score={self.score!r})"
+        )
+
+
+class SimilarBookState(Base):
+    __tablename__ = "similar_book_states"
+
+    # Книги, для которых список соседей уже посчитан (даже если он пуст)
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("books.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Длина посчитанного списка. Если в similar_books строк меньше, СУБД
+    # удалила соседа каскадом (ondelete у similar_id) и список нужно пересчитать
+    neighbours: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"SimilarBookState(book_id={self.book_id!r}, neighbours={self.neighbours!r})"
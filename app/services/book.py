@@ -1,9 +1,15 @@
+from dataclasses import dataclass
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload
 
+from ..config.catalog import BOOK_CARD_CACHE_SIZE
 from ..models.book import Book, BookFile
 from ..models.db import async_session_factory
+from ..models.records import BookFileRecord
+from .cache import TTLCache
+from .catalog_version import get_catalog_version
 
 from ..texts import (
     BOOK_NAME,
@@ -11,62 +17,117 @@ from ..texts import (
 )
 
 
-async def get_book_files(book_id: int) -> list[BookFile]:
+@dataclass(frozen=True, slots=True)
+class BookCard:
     """
-    Возвращает список объектов BookFile для указанной книги.
+    Всё, что нужно клавиатуре форматов, скачиванию и вопросам по книге:
+    сама книга, её жанр и файлы.
+    """
+    id: int
+    title: str
+    author: str
+    genre_id: int
+    genre_name: str
+    files: tuple[BookFileRecord, ...]
 
-    Используется при формировании клавиатуры форматов: каждый BookFile
-    представляет отдельный файл (fb2/pdf/epub и т.п.) для данного book_id.
+    @property
+    def name(self) -> str:
+        """
+        Название и автор книги в виде "Название — Автор".
+        """
+        return BOOK_NAME.format(title=self.title, author=self.author)
 
-    Всегда возвращает список, который может быть пустым.
-    """
-    async with async_session_factory() as session:
-        result = await session.execute(
-            select(BookFile).
-            where(BookFile.book_id == book_id)
-        )
-        # scalars() извлекает именно объекты BookFile, а не сырые строки
-        book_files = list(result.scalars().all())
-    return book_files
+    def file(self, format_: str) -> BookFileRecord | None:
+        """
+        Файл книги в запрошенном формате или None, если такого формата нет.
+        """
+        for book_file in self.files:
+            if book_file.format == format_:
+                return book_file
+        return None
 
-async def get_book_file_path(book_id: int, format_: str) -> Path | None:
+    def file_path(self, format_: str) -> Path | None:
+        """
+        Относительный (от BOOKS_DIR_STORAGE) путь к файлу книги в запрошенном
+        формате или None, если такого формата у книги нет.
+        """
+        book_file = self.file(format_)
+        if book_file is None:
+            return None
+        # В БД хранится как строка, приводим к Path для удобства
+        return Path(book_file.path)
+
+
+# Карточки книг по book_id; сбрасываются при смене поколения каталога
+_cards: TTLCache = TTLCache(maxsize=BOOK_CARD_CACHE_SIZE)
+
+
+async def get_book_card(book_id: int) -> BookCard | None:
     """
-    Определяет относительный путь к файлу книги по её id и запрошенному формату, 
-    дополнительно проверяя, что формат соответствует callback_data. 
+    Возвращает карточку книги (книга + жанр + файлы) или None, если книги нет.
 
-    - Возвращает Path(relative_path) относительно BOOKS_DIR_STORAGE
-    - Возвращает None, если файл с такими параметрами не найден в БД.
+    Книга, жанр и файлы загружаются одним запросом (joinedload), результат
+    кэшируется по book_id до следующего изменения каталога.
     """
+    _cards.ensure_version(get_catalog_version())
+    card = _cards.get(book_id)
+    if card is not None:
+        return card
+
+    version = get_catalog_version()
     async with async_session_factory() as session:
         result = await session.execute(
-            select(BookFile).
-            where(
-                BookFile.book_id == book_id,
-                BookFile.format == format_,
-            )
+            select(Book).
+            where(Book.id == book_id).
+            options(joinedload(Book.genre), joinedload(Book.files))
         )
-
-        book_file = result.scalar_one_or_none()
-        if book_file is None:
+        # unique() обязателен при joinedload коллекции: строки книги дублируются по файлам
+        book = result.unique().scalar_one_or_none()
+        if book is None:
             return None
-        # В БД хранится как строка, приводим к Path для удобства
-        path = Path(book_file.path)
 
-        return path
+        card = BookCard(
+            id=book.id,
+            title=book.title,
+            author=book.author,
+            genre_id=book.genre_id,
+            genre_name=book.genre.name,
+            files=tuple(
+                BookFileRecord(
+                    book_id=f.book_id,
+                    format=f.format,
+                    path=f.path,
+                    telegram_file_id=f.telegram_file_id,
+                )
+                for f in book.files
+            ),
+        )
+
+    if get_catalog_version() == version:
+        _cards.set(book_id, card)
+    return card
 
-async def get_book_name(book_id: int) -> str:
-    """
-    Получает название и автора книги по её ID.
 
-    - Всегда возвращает строку.
-    - Если книга не найдена - возвращает строку "Неизвестная книга".
+async def set_telegram_file_id(book_id: int, format_: str, file_id: str | None) -> None:
+    """
+    Запоминает file_id отправленного документа (или сбрасывает его, если
+    передан None) и убирает карточку книги из кэша, чтобы следующая
+    отправка увидела новое значение.
     """
     async with async_session_factory() as session:
-        book = await session.execute(
-            select(Book).
-            where(Book.id == book_id)
+        await session.execute(
+            update(BookFile).
+            where(BookFile.book_id == book_id, BookFile.format == format_).
+            values(telegram_file_id=file_id)
         )
-        book_obj = book.scalar_one_or_none()
-        if book_obj is None:
-            return BOOK_UNKNOWN_BOOK
-        return BOOK_NAME.format(title=book_obj.title, author=book_obj.author)
\ No newline at end of file
+        await session.commit()
+    _cards.pop(book_id)
+
+
+def book_card_name(card: BookCard | None) -> str:
+    """
+    Название книги для сообщений; "Неизвестная книга", если карточки нет.
+    """
+    if card is None:
+        return BOOK_UNKNOWN_BOOK
+    return card.name
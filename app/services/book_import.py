@@ -0,0 +1,314 @@
+import asyncio
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterator, List
+
+from sqlalchemy import select, tuple_
+
+from app.models.book import Book, BookFile, Genre
+from app.models.db import async_session_factory
+from app.services.catalog_version import bump_catalog_version
+from app.services.file_sync import BookData, parse_file_path, sync_lock
+from ..config.storage import BOOKS_DIR_STORAGE, GENRE_MAP, IMPORT_BATCH_SIZE
+from ..texts import IMPORT_REPORT
+
+
+@dataclass
+class ImportStats:
+    """
+    Итоги импорта архива.
+    """
+    files: int = 0  # новых файлов распаковано и зарегистрировано
+    bytes: int = 0  # их суммарный размер
+    skipped: int = 0  # уже есть в хранилище или в БД
+    invalid: int = 0  # имя не соответствует <genre>/<Название> - <Автор>.<ext>
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class _ImportedFile:
+    """
+    Файл, распакованный в хранилище и ожидающий регистрации в БД.
+    """
+    book_data: BookData
+    rel_path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+# Ключ файла в каталоге: (имя жанра, название, автор, формат) без учёта
+# регистра — так же, как сравнивает строки БД с collation *_ci (MySQL)
+_FileKey = tuple[str, str, str, str]
+
+def _genre_name(book_data: BookData) -> str:
+    return GENRE_MAP.get(book_data.genre, book_data.genre)
+
+
+def _fold_key(genre_name: str, title: str, author: str, format_: str) -> _FileKey:
+    return genre_name.casefold(), title.casefold(), author.casefold(), format_.casefold()
+
+
+def _file_key(book_data: BookData) -> _FileKey:
+    return _fold_key(_genre_name(book_data), book_data.title, book_data.author, book_data.format)
+
+
+def _iter_archive(archive_path: Path) -> Iterator[tuple[str, Callable[[], BinaryIO]]]:
+    """
+    Перебирает обычные файлы архива по одному: (имя внутри архива, открыть поток).
+
+    Zip читается по центральному каталогу, tar (в том числе сжатый) —
+    в потоковом режиме, без распаковки всего архива во временную папку.
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, lambda info=info: archive.open(info)
+        return
+
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for member in archive:
+            if member.isfile():
+                yield member.name, lambda member=member: archive.extractfile(member)
+
+
+def _safe_rel_path(name: str) -> PurePosixPath | None:
+    """
+    Путь записи архива относительно хранилища или None, если он выходит
+    за пределы хранилища (абсолютный путь, "..").
+    """
+    rel_path = PurePosixPath(name.replace("\\", "/"))
+    if rel_path.is_absolute() or ".." in rel_path.parts:
+        return None
+    return rel_path
+
+
+def _extract_batches(
+    archive_path: Path,
+    known_paths: set[str],
+    known_keys: set[_FileKey],
+    stats: ImportStats,
+    batch_size: int,
+) -> Iterator[List[_ImportedFile]]:
+    """
+    Распаковывает в BOOKS_DIR_STORAGE новые файлы архива и отдаёт их пачками.
+
+    Файлы, которые уже есть на диске или в БД (по пути или по книге
+    и формату), пропускаются; существующие файлы не перезаписываются.
+    Каждый файл пишется во временный файл рядом и затем атомарно
+    переименовывается, поэтому синхронизация не увидит недописанных файлов.
+    """
+    batch: List[_ImportedFile] = []
+    for name, open_entry in _iter_archive(archive_path):
+        rel_path = _safe_rel_path(name)
+        if rel_path is None:
+            stats.invalid += 1
+            continue
+        # Скрытые файлы и каталоги (в т.ч. "__MACOSX/<жанр>/._<файл>")
+        # синхронизация не видит — не распаковываем их
+        if any(part.startswith(".") for part in rel_path.parts):
+            stats.invalid += 1
+            continue
+
+        full_path = BOOKS_DIR_STORAGE / rel_path
+        try:
+            book_data = parse_file_path(full_path)
+        except ValueError as e:
+            print(f"Ошибка при разборе файла {name}: {e}")
+            stats.invalid += 1
+            continue
+
+        rel_path_str = rel_path.as_posix()
+        key = _file_key(book_data)
+        if rel_path_str in known_paths or key in known_keys or full_path.exists():
+            stats.skipped += 1
+            continue
+
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = full_path.with_name(f".{full_path.name}.part")
+        try:
+            with open_entry() as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp_path, full_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        known_paths.add(rel_path_str)
+        known_keys.add(key)
+        stat = full_path.stat()
+        stats.bytes += stat.st_size
+        batch.append(
+            _ImportedFile(book_data, rel_path_str, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        )
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def _load_known_files() -> tuple[set[str], set[_FileKey]]:
+    """
+    Пути и ключи (жанр, название, автор, формат) всех файлов из БД —
+    одним запросом, чтобы не проверять каждую запись архива отдельно.
+    """
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(BookFile.path, Genre.name, Book.title, Book.author, BookFile.format).
+            join(Book, BookFile.book_id == Book.id).
+            join(Genre, Book.genre_id == Genre.id)
+        )
+        paths: set[str] = set()
+        keys: set[_FileKey] = set()
+        for path, *key in result:
+            paths.add(path)
+            keys.add(_fold_key(*key))
+        return paths, keys
+
+
+async def _register_batch(
+    batch: List[_ImportedFile],
+    genre_ids: dict[str, int],
+) -> List[_ImportedFile]:
+    """
+    Регистрирует пачку новых файлов в БД одной транзакцией: недостающие
+    жанры и книги создаются, существующие книги ищутся одним запросом.
+
+    Файлы, для книги и формата которых в БД уже есть запись (БД может
+    считать равными строки, различающиеся не только регистром), не
+    регистрируются и удаляются с диска. Возвращает эти файлы.
+    """
+    async with async_session_factory() as session:
+        for genre_name in {_genre_name(item.book_data) for item in batch} - genre_ids.keys():
+            genre = (await session.execute(
+                select(Genre).where(Genre.name == genre_name)
+            )).scalar_one_or_none()
+            if genre is None:
+                genre = Genre(name=genre_name)
+                session.add(genre)
+                await session.flush()
+            genre_ids[genre_name] = genre.id
+
+        def book_key(book_data: BookData) -> tuple[int, str, str]:
+            return genre_ids[_genre_name(book_data)], book_data.title, book_data.author
+
+        book_keys = {book_key(item.book_data) for item in batch}
+        result = await session.execute(
+            select(Book.genre_id, Book.title, Book.author, Book.id).
+            where(tuple_(Book.genre_id, Book.title, Book.author).in_(book_keys))
+        )
+        book_ids = {(genre_id, title, author): id_ for genre_id, title, author, id_ in result}
+        # При сопоставлении строк без учёта регистра (MySQL *_ci) IN вернёт
+        # существующую книгу в написании БД — дочитываем такие по одной
+        for key in book_keys - book_ids.keys():
+            book_id = await session.scalar(
+                select(Book.id).where(Book.genre_id == key[0], Book.title == key[1], Book.author == key[2])
+            )
+            if book_id is not None:
+                book_ids[key] = book_id
+
+        new_books = {
+            key: Book(genre_id=key[0], title=key[1], author=key[2])
+            for key in book_keys - book_ids.keys()
+        }
+        session.add_all(new_books.values())
+        await session.flush()
+        book_ids.update({key: book.id for key, book in new_books.items()})
+
+        file_keys = {(book_ids[book_key(item.book_data)], item.book_data.format) for item in batch}
+        result = await session.execute(
+            select(BookFile.book_id, BookFile.format).
+            where(tuple_(BookFile.book_id, BookFile.format).in_(file_keys))
+        )
+        taken = set(result.tuples())
+        duplicates: List[_ImportedFile] = []
+        for item in batch:
+            file_key = (book_ids[book_key(item.book_data)], item.book_data.format)
+            if file_key in taken:
+                duplicates.append(item)
+                continue
+            taken.add(file_key)
+            session.add(
+                BookFile(
+                    book_id=file_key[0],
+                    format=file_key[1],
+                    path=item.rel_path,
+                    size=item.size,
+                    mtime_ns=item.mtime_ns,
+                    inode=item.inode,
+                )
+            )
+        await session.commit()
+
+    for item in duplicates:
+        print(f"Файл {item.rel_path} повторяет уже зарегистрированную книгу и формат, пропущен")
+        (BOOKS_DIR_STORAGE / item.rel_path).unlink(missing_ok=True)
+    return duplicates
+
+
+async def import_archive(archive_path: Path, batch_size: int = IMPORT_BATCH_SIZE) -> ImportStats:
+    """
+    Импортирует книги из zip/tar архива со структурой
+        <genre_slug>/<Название> - <Автор>.<расширение>
+
+    Записи распаковываются в BOOKS_DIR_STORAGE по одной (чтение архива идёт
+    в отдельном потоке), в БД регистрируются только новые файлы — пачками
+    по batch_size в одной транзакции. После импорта номер поколения каталога
+    увеличивается, чтобы сбросить кэши каталога и поиска.
+    """
+    if not archive_path.is_file():
+        raise ValueError(f"Архив {archive_path} не найден")
+
+    stats = ImportStats()
+    async with sync_lock:
+        started = time.perf_counter()
+        known_paths, known_keys = await _load_known_files()
+        genre_ids: dict[str, int] = {}
+
+        batches = _extract_batches(archive_path, known_paths, known_keys, stats, batch_size)
+        try:
+            while True:
+                # Следующую пачку распаковываем в потоке, чтобы не блокировать цикл событий
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                duplicates = await _register_batch(batch, genre_ids)
+                stats.files += len(batch) - len(duplicates)
+                stats.skipped += len(duplicates)
+                stats.bytes -= sum(item.size for item in duplicates)
+        finally:
+            if stats.files:
+                bump_catalog_version()
+            stats.seconds = time.perf_counter() - started
+
+    return stats
+
+
+def import_report(stats: ImportStats) -> str:
+    """
+    Текстовый отчёт об импорте для администратора.
+    """
+    return IMPORT_REPORT.format(
+        files=stats.files,
+        megabytes=stats.bytes / (1024 * 1024),
+        skipped=stats.skipped,
+        invalid=stats.invalid,
+        seconds=stats.seconds,
+        files_per_second=stats.files_per_second,
+        mb_per_second=stats.mb_per_second,
+    )
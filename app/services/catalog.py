@@ -1,29 +1,100 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, tuple_
 
+from ..config.catalog import CATALOG_PAGE_SIZE, CATALOG_PAGES_CACHE_SIZE
 from ..models.book import Book, Genre
 from ..models.db import async_session_factory
+from ..models.records import (
+    BOOK_RECORD_COLUMNS,
+    GENRE_RECORD_COLUMNS,
+    BookRecord,
+    GenreRecord,
+)
+from .cache import TTLCache
+from .catalog_version import get_catalog_version
 
 
-async def get_all_genres() -> List[Genre]:
+# Кэш каталога в памяти процесса. Всё ниже валидно в пределах одного поколения
+# каталога и сбрасывается, когда синхронизация его увеличивает.
+
+# Список жанров для "📚 Каталог" и "back:genres"
+_genres: Optional[List[GenreRecord]] = None
+# Готовые страницы: (genre_id, page, page_size) -> (книги, total_pages)
+_pages_cache: TTLCache = TTLCache(maxsize=CATALOG_PAGES_CACHE_SIZE)
+# Число книг в каждом жанре: считается одним GROUP BY на поколение каталога
+_genre_counts: Optional[Dict[int, int]] = None
+# Ключ (title, id) первой книги известных страниц:
+# (genre_id, page_size) -> {page: (title, id)}
+_page_anchors: Dict[Tuple[int, int], Dict[int, Tuple[str, int]]] = {}
+_state_version: Optional[int] = None
+
+
+def _ensure_fresh() -> None:
+    """
+    Сбрасывает кэш жанров, страниц, счётчики и якоря страниц,
+    если синхронизация изменила каталог.
+    """
+    global _genres, _genre_counts, _state_version
+    version = get_catalog_version()
+    if _state_version != version:
+        _genres = None
+        _genre_counts = None
+        _page_anchors.clear()
+        _pages_cache.clear()
+        _state_version = version
+
+
+async def _get_genre_counts() -> Dict[int, int]:
+    """
+    Возвращает {genre_id: число книг}, пересчитывая его только после синхронизации.
+    """
+    global _genre_counts
+    _ensure_fresh()
+    if _genre_counts is None:
+        async with async_session_factory() as session:
+            result = await session.execute(
+                select(Book.genre_id, func.count()).
+                group_by(Book.genre_id)
+            )
+            _genre_counts = {genre_id: count for genre_id, count in result}
+    return _genre_counts
+
+
+async def get_all_genres() -> List[GenreRecord]:
     """
     Возвращает все жанры отсортированные по имени.
 
-    Используется для построения главного каталога жанров.
+    Используется для построения главного каталога жанров. Список читается
+    из БД один раз на поколение каталога, дальше отдаётся из памяти.
     """
-    async with async_session_factory() as session:
-        result = await session.execute(
-            select(Genre).order_by(Genre.name)
-        )
-        return list(result.scalars().all())
+    global _genres
+    _ensure_fresh()
+    if _genres is None:
+        version = get_catalog_version()
+        async with async_session_factory() as session:
+            result = await session.execute(
+                select(*GENRE_RECORD_COLUMNS).order_by(Genre.name)
+            )
+            genres = [GenreRecord(*row) for row in result]
+        if get_catalog_version() != version:
+            return genres
+        _genres = genres
+    return list(_genres)
+
+
+def get_catalog_cache_stats() -> dict:
+    """
+    Счётчики кэша страниц каталога (size/hits/misses/hit_rate).
+    """
+    return _pages_cache.stats()
 
 
 async def get_books_page_by_genre(
     genre_id: int,
     page: int,
-    page_size: int = 10,
-) -> tuple[List[Book], int]:
+    page_size: int = CATALOG_PAGE_SIZE,
+) -> tuple[List[BookRecord], int]:
     """
     Получает одну страницу списка книг для указанного жанра.
 
@@ -36,32 +107,65 @@ async def get_books_page_by_genre(
     Возвращает:
       - список книг для текущей страницы;
       - общее количество страниц total_pages (0, если в жанре нет книг).
+
+    Книги упорядочены по (title, id) и выбираются по ключу (keyset), а не
+    через OFFSET от начала жанра; число книг в жанре берётся из кэша,
+    обновляемого после синхронизации. Готовые страницы тоже кэшируются
+    до следующей синхронизации.
+    """
+    _ensure_fresh()
+    cache_key = (genre_id, page, page_size)
+    cached = _pages_cache.get(cache_key)
+    if cached is not None:
+        return list(cached[0]), cached[1]
+
+    version = get_catalog_version()
+    books, total_pages = await _read_books_page(genre_id, page, page_size)
+    # Если во время чтения прошла синхронизация, страница могла устареть
+    if get_catalog_version() == version:
+        _pages_cache.set(cache_key, (books, total_pages))
+    return list(books), total_pages
+
+
+async def _read_books_page(
+    genre_id: int,
+    page: int,
+    page_size: int,
+) -> tuple[List[BookRecord], int]:
+    """
+    Читает страницу жанра из БД (keyset по (title, id), см. get_books_page_by_genre).
     """
+    counts = await _get_genre_counts()
+    total_count = counts.get(genre_id, 0)
+
+    if total_count == 0:
+        return [], 0
+
+    total_pages = (total_count + page_size - 1) // page_size
+    # Защита от выхода за диапазон
+    page = max(1, min(page, total_pages))
+
+    # Ищем ближайшую известную страницу не дальше запрошенной и читаем от её
+    # первой книги. При последовательном листании это чистый seek по индексу
+    # (genre_id, title, id), при прыжке — OFFSET только на разницу страниц.
+    anchors = _page_anchors.setdefault((genre_id, page_size), {})
+    known_page = max((p for p in anchors if p <= page), default=1)
+    skip = (page - known_page) * page_size
+
+    stmt = select(*BOOK_RECORD_COLUMNS).where(Book.genre_id == genre_id)
+    if known_page in anchors:
+        stmt = stmt.where(tuple_(Book.title, Book.id) >= anchors[known_page])
+    # Берём на одну книгу больше, чтобы сразу узнать начало следующей страницы
+    stmt = stmt.order_by(Book.title, Book.id).offset(skip).limit(page_size + 1)
+
     async with async_session_factory() as session:
-        # Подсчитываем общее количество книг в жанре
-        count_result = await session.execute(
-            select(func.count()).
-            select_from(Book).
-            where(Book.genre_id == genre_id)
-        )
-        total_count = count_result.scalar_one() or 0
-
-        if total_count == 0:
-            return [], 0
-
-        total_pages = (total_count + page_size - 1) // page_size
-        # Защита от выхода за диапазон
-        page = max(1, min(page, total_pages))
-        offset = (page - 1) * page_size
-
-        # Выбираем книги для текущей страницы
-        result = await session.execute(
-            select(Book).
-            where(Book.genre_id == genre_id).
-            order_by(Book.title).
-            offset(offset).
-            limit(page_size)
-        )
-        books = list(result.scalars().all())
-
-        return books, total_pages
+        result = await session.execute(stmt)
+        rows = [BookRecord(*row) for row in result]
+
+    books = rows[:page_size]
+    if books:
+        anchors[page] = (books[0].title, books[0].id)
+    if len(rows) > page_size:
+        anchors[page + 1] = (rows[-1].title, rows[-1].id)
+
+    return books, total_pages
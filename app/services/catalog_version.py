@@ -0,0 +1,19 @@
+# Номер поколения каталога. Увеличивается каждый раз, когда синхронизация
+# меняет книги в БД; кэши, зависящие от каталога, сравнивают его со своим.
+_catalog_version = 0
+
+
+def get_catalog_version() -> int:
+    """
+    Возвращает текущий номер поколения каталога.
+    """
+    return _catalog_version
+
+
+def bump_catalog_version() -> int:
+    """
+    Отмечает, что каталог изменился, и возвращает новый номер поколения.
+    """
+    global _catalog_version
+    _catalog_version += 1
+    return _catalog_version
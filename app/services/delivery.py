@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.models.book import BookFile
+from app.models.db import async_session_factory
+from app.services.file_sync import storage_path
+from ..config.delivery import (
+    DELIVERY_CACHE_DIR,
+    DELIVERY_CACHE_MAX_BYTES,
+    DELIVERY_COMPRESS_FORMATS,
+    DELIVERY_COMPRESS_WORKERS,
+    DELIVERY_COMPRESSION,
+    DELIVERY_MIN_SAVING,
+)
+
+# Манифест кэша: относительный путь файла -> [size, mtime_ns, sha256, имя варианта].
+# Имя варианта None, если сжатие не даёт выигрыша DELIVERY_MIN_SAVING.
+_MANIFEST_NAME = "manifest.json"
+_manifest: Dict[str, list] = {}
+_manifest_loaded = False
+
+# Фоновые пересборки вариантов, вытесненных из кэша, по относительному пути
+_rebuilding: Dict[str, asyncio.Task] = {}
+
+# Сборка вариантов после синхронизации или импорта (см. schedule_delivery_variants)
+_build_lock = asyncio.Lock()
+_build_task: Optional[asyncio.Task] = None
+_build_again = False
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _compress_file(
+    src_path: str,
+    cache_dir: str,
+    format_: str,
+    min_saving: float,
+) -> Tuple[str, Optional[str]]:
+    """
+    Считает sha256 файла и, если варианта с таким хэшем ещё нет, сжимает
+    файл в <sha256>.<format>.zip в каталоге кэша.
+
+    Возвращает (sha256, имя варианта) или (sha256, None), если сжатие
+    экономит меньше min_saving от размера файла. Выполняется в пуле процессов.
+    """
+    src = Path(src_path)
+    sha = _hash_file(src)
+    name = f"{sha}.{format_}.zip"
+    variant = Path(cache_dir) / name
+    if variant.exists():
+        return sha, name
+
+    tmp = variant.with_name(f".{name}.part")
+    try:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            archive.write(src, arcname=src.name)
+        if tmp.stat().st_size > src.stat().st_size * (1 - min_saving):
+            return sha, None
+        os.replace(tmp, variant)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return sha, name
+
+
+def _load_manifest() -> None:
+    global _manifest_loaded
+    if _manifest_loaded:
+        return
+    try:
+        _manifest.update(json.loads((DELIVERY_CACHE_DIR / _MANIFEST_NAME).read_text("utf-8")))
+    except (OSError, ValueError):
+        pass
+    _manifest_loaded = True
+
+
+def _save_manifest() -> None:
+    path = DELIVERY_CACHE_DIR / _MANIFEST_NAME
+    tmp = path.with_name(f".{_MANIFEST_NAME}.part")
+    tmp.write_text(json.dumps(_manifest, ensure_ascii=False), "utf-8")
+    os.replace(tmp, path)
+
+
+def _evict() -> None:
+    """
+    Удаляет варианты, на которые не ссылается манифест, и, пока кэш больше
+    DELIVERY_CACHE_MAX_BYTES, самые давно отправлявшиеся варианты
+    (время последней отправки хранится в mtime файла варианта).
+    """
+    referenced = {entry[3] for entry in _manifest.values() if entry[3]}
+    variants = []
+    total = 0
+    for entry in os.scandir(DELIVERY_CACHE_DIR):
+        if not entry.name.endswith(".zip") or entry.name.startswith("."):
+            continue
+        path = Path(entry.path)
+        if entry.name not in referenced:
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        variants.append((stat.st_mtime_ns, stat.st_size, path))
+        total += stat.st_size
+
+    variants.sort()
+    for _, size, path in variants:
+        if total <= DELIVERY_CACHE_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+async def build_delivery_variants() -> None:
+    """
+    Готовит сжатые варианты файлов форматов DELIVERY_COMPRESS_FORMATS
+    (вызывается после синхронизации хранилища).
+
+    Файлы с прежними размером и временем изменения пропускаются без
+    пересчёта хэша; у изменённых хэш считается заново, и вариант
+    пересобирается, только если такого хэша в кэше ещё нет. Сжатие идёт
+    в пуле процессов. В конце кэш ужимается до DELIVERY_CACHE_MAX_BYTES.
+    """
+    if not DELIVERY_COMPRESSION:
+        return
+
+    async with _build_lock:
+        await _build_variants()
+
+
+async def _build_variants() -> None:
+    DELIVERY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _load_manifest()
+
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(BookFile.path, BookFile.format).
+            where(BookFile.format.in_(DELIVERY_COMPRESS_FORMATS))
+        )
+        files = result.all()
+
+    loop = asyncio.get_running_loop()
+    pending: List[Tuple[str, int, int, asyncio.Future]] = []
+    actual = set()
+    with ProcessPoolExecutor(max_workers=DELIVERY_COMPRESS_WORKERS) as executor:
+        for rel_path, format_ in files:
+            full_path = storage_path(rel_path)
+            try:
+                stat = full_path.stat()
+            except OSError:
+                continue
+            actual.add(rel_path)
+
+            entry = _manifest.get(rel_path)
+            if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                continue
+
+            future = loop.run_in_executor(
+                executor,
+                _compress_file,
+                str(full_path),
+                str(DELIVERY_CACHE_DIR),
+                format_,
+                DELIVERY_MIN_SAVING,
+            )
+            pending.append((rel_path, stat.st_size, stat.st_mtime_ns, future))
+
+        for rel_path, size, mtime_ns, future in pending:
+            try:
+                sha, variant = await future
+            except OSError as e:
+                print(f"Ошибка при сжатии файла {rel_path}: {e}")
+                continue
+            _manifest[rel_path] = [size, mtime_ns, sha, variant]
+
+    for rel_path in _manifest.keys() - actual:
+        del _manifest[rel_path]
+
+    _save_manifest()
+    await asyncio.to_thread(_evict)
+
+
+async def _build_in_background() -> None:
+    global _build_again
+    while True:
+        _build_again = False
+        try:
+            await build_delivery_variants()
+        except Exception as e:
+            print(f"Ошибка при подготовке сжатых вариантов: {e}")
+        if not _build_again:
+            break
+
+
+def schedule_delivery_variants() -> None:
+    """
+    Запускает build_delivery_variants в фоне (после синхронизации изменений
+    хранилища или импорта). Если сборка уже идёт, после неё будет выполнена
+    ещё одна — уже с новыми файлами.
+    """
+    global _build_task, _build_again
+    if not DELIVERY_COMPRESSION:
+        return
+    if _build_task is not None and not _build_task.done():
+        _build_again = True
+        return
+    _build_task = asyncio.create_task(_build_in_background())
+
+
+async def _rebuild_variant(rel_path: str, format_: str) -> None:
+    """
+    Пересобирает вариант, вытесненный из кэша, в фоне.
+    """
+    try:
+        await asyncio.to_thread(
+            _compress_file,
+            str(storage_path(rel_path)),
+            str(DELIVERY_CACHE_DIR),
+            format_,
+            DELIVERY_MIN_SAVING,
+        )
+        # _evict удаляет варианты, которых нет в манифесте, — в том числе
+        # уже сжатые, но ещё не записанные в манифест идущей сборкой
+        async with _build_lock:
+            await asyncio.to_thread(_evict)
+    except OSError as e:
+        print(f"Ошибка при сжатии файла {rel_path}: {e}")
+    finally:
+        _rebuilding.pop(rel_path, None)
+
+
+def get_delivery_file(rel_path: Path) -> Tuple[Path, str]:
+    """
+    Файл для отправки пользователю и имя, под которым его отправить.
+
+    Если для файла есть сжатый вариант, возвращается он (с именем вида
+    "<Название> - <Автор>.fb2.zip"), и время его последней отправки
+    обновляется для LRU-вытеснения. Иначе возвращается исходный файл;
+    если вариант был вытеснен из кэша, он пересобирается в фоне.
+    """
+    full_path = storage_path(rel_path)
+    if not DELIVERY_COMPRESSION:
+        return full_path, full_path.name
+
+    _load_manifest()
+    key = rel_path.as_posix()
+    entry = _manifest.get(key)
+    if entry is None or entry[3] is None:
+        return full_path, full_path.name
+
+    # Файл изменился после синхронизации — вариант устарел
+    try:
+        stat = full_path.stat()
+    except OSError:
+        return full_path, full_path.name
+    if entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+        return full_path, full_path.name
+
+    variant = DELIVERY_CACHE_DIR / entry[3]
+    try:
+        # mtime варианта — время последней отправки
+        os.utime(variant)
+    except FileNotFoundError:
+        if key not in _rebuilding:
+            format_ = entry[3].split(".")[1]
+            _rebuilding[key] = asyncio.get_running_loop().create_task(
+                _rebuild_variant(key, format_)
+            )
+        return full_path, full_path.name
+
+    return variant, f"{full_path.name}.zip"
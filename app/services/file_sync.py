@@ -1,12 +1,45 @@
-from dataclasses import dataclass
+import asyncio
+import html
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from itertools import repeat
 from pathlib import Path
+from stat import S_ISDIR, S_ISREG
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.book import Book, BookFile, Genre
-from app.models.db import async_session_factory
-from ..config.storage import BOOKS_DIR_STORAGE, GENRE_MAP
+from app.models.db import async_session_factory, insert_on_conflict
+from app.services.catalog_version import bump_catalog_version
+from ..config.storage import (
+    BOOKS_DIR_EXTRA_STORAGES,
+    BOOKS_DIR_STORAGE,
+    GENRE_MAP,
+    SYNC_BULK,
+    SYNC_CHUNK_SIZE,
+    SYNC_PRUNE_MAX_FRACTION,
+    SYNC_PRUNE_MIN_FILES,
+    SYNC_SCAN_QUEUE_SIZE,
+    SYNC_SCAN_WORKERS,
+)
+from ..texts import (
+    PRUNE_ABORTED,
+    PRUNE_DONE,
+    PRUNE_DRY_RUN,
+    PRUNE_EXAMPLE,
+    PRUNE_OVER_LIMIT,
+    PRUNE_REPORT,
+)
+
+# Синхронизации и импорты архивов меняют одно хранилище и одни таблицы —
+# выполняем их по одному
+sync_lock = asyncio.Lock()
 
 
 @dataclass
@@ -20,6 +53,39 @@ class BookData:
     format: str
 
 
+@dataclass
+class SyncStats:
+    """
+    Итоги синхронизации хранилища с БД.
+    """
+    added: int = 0  # новых файлов
+    modified: int = 0  # изменившихся (размер, mtime или inode)
+    removed: int = 0  # исчезнувших
+    unchanged: int = 0
+    orphaned: int = 0  # исчезнувших, но оставленных в БД (превышен порог удаления)
+    duplicates: int = 0  # повторяют книгу и формат другого файла, не зарегистрированы
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+@dataclass
+class PruneReport:
+    """
+    Итоги (или план, при dry_run) удаления из каталога файлов,
+    которых больше нет в хранилище.
+    """
+    files: int = 0  # записей BookFile без файла на диске
+    books: int = 0  # книг, у которых не останется файлов
+    genres: int = 0  # жанров, в которых не останется книг
+    total_files: int = 0  # всего записей BookFile
+    examples: list[str] = field(default_factory=list)  # первые пути исчезнувших файлов
+    over_limit: bool = False  # доля исчезнувших превышает SYNC_PRUNE_MAX_FRACTION
+    dry_run: bool = True
+    pruned: bool = False  # записи удалены
+
+
 def parse_file_path(file_path: Path) -> BookData:
     """
     Получаем информацию о книге по пути к файлу.
@@ -59,6 +125,14 @@ def parse_file_path(file_path: Path) -> BookData:
     return BookData(genre=genre, title=title, author=author, format=format_)
 
 
+def _mark_catalog_changed(session: AsyncSession) -> None:
+    """
+    Помечает сессию синхронизации как изменившую каталог,
+    чтобы после коммита увеличить номер поколения каталога.
+    """
+    session.info["catalog_changed"] = True
+
+
 async def get_or_create_genre(session: AsyncSession, genre_slug: str) -> Genre:
     """
     Получаем или создаём жанр по его slug'у.
@@ -79,6 +153,7 @@ async def get_or_create_genre(session: AsyncSession, genre_slug: str) -> Genre:
     genre = Genre(name=display_name)
     session.add(genre)
     await session.flush()
+    _mark_catalog_changed(session)
     return genre
 
 
@@ -113,14 +188,41 @@ async def get_or_create_book(
     )
     session.add(book)
     await session.flush()
+    _mark_catalog_changed(session)
     return book
 
 
+def _is_duplicate(existing_path: str, rel_path: str) -> bool:
+    """
+    Дубликат ли новый файл rel_path уже зарегистрированного existing_path
+    той же книги и формата (например, genre/X - Y.fb2 и genre/sub/X - Y.fb2).
+
+    Да, если прежний файл на месте: тогда запись сохраняет прежний путь.
+    Иначе путь записи менялся бы туда-обратно на каждой синхронизации,
+    каждый раз сбрасывая кэши каталога. Если прежнего файла нет, это
+    перемещение, и запись переходит на новый путь.
+    """
+    if existing_path == rel_path or not storage_path(existing_path).is_file():
+        return False
+    _warn_duplicate(existing_path, rel_path)
+    return True
+
+
+def _warn_duplicate(existing_path: str, rel_path: str) -> None:
+    print(
+        f"Файлы {existing_path} и {rel_path} — одна и та же книга в одном формате, "
+        f"в каталоге остаётся {existing_path}"
+    )
+
+
 async def get_or_create_book_file(
     session: AsyncSession,
     book: Book,
     format_: str,
     rel_path: str,
+    size: int | None = None,
+    mtime_ns: int | None = None,
+    inode: int | None = None,
 ) -> BookFile:
     """
     Получаем или создаём файловый вариант книги (конкретный формат и путь).
@@ -129,7 +231,10 @@ async def get_or_create_book_file(
       - одна запись BookFile на пару (book_id, format_).
 
     Если запись уже есть, просто обновляем путь (на случай, если файл
-    был перемещён в файловой системе).
+    был перемещён в файловой системе). Если изменились размер или время
+    изменения файла, сбрасываем сохранённый telegram_file_id — он указывает
+    на старое содержимое. Если файл записи на месте, rel_path — дубликат:
+    запись возвращается без изменений (см. _is_duplicate).
     """
     result = await session.execute(
         select(BookFile).where(
@@ -139,49 +244,755 @@ async def get_or_create_book_file(
     )
     bf = result.scalar_one_or_none()
     if bf:
-        bf.path = rel_path
+        if _is_duplicate(bf.path, rel_path):
+            return bf
+        if bf.path != rel_path:
+            bf.path = rel_path
+            _mark_catalog_changed(session)
+        bf.inode = inode
+        if (bf.size, bf.mtime_ns) != (size, mtime_ns):
+            bf.size = size
+            bf.mtime_ns = mtime_ns
+            if bf.telegram_file_id is not None:
+                bf.telegram_file_id = None
+                _mark_catalog_changed(session)
         return bf
 
     bf = BookFile(
         book_id=book.id,
         format=format_,
         path=rel_path,
+        size=size,
+        mtime_ns=mtime_ns,
+        inode=inode,
     )
 
     session.add(bf)
     await session.flush()
+    _mark_catalog_changed(session)
     return bf
 
 
-async def sync_book_from_fs() -> None:
+# Снимок файла для сравнения с предыдущей синхронизацией: (size, mtime_ns, inode)
+FileStat = Tuple[int, int, int]
+
+
+def storage_roots() -> List[Path]:
     """
-    Обходит локальный каталог BOOKS_DIR_STORAGE и синхронизирует содержимое с БД.
+    Корни хранилища: BOOKS_DIR_STORAGE и BOOKS_DIR_EXTRA_STORAGES.
+    """
+    return [BOOKS_DIR_STORAGE, *BOOKS_DIR_EXTRA_STORAGES]
+
 
-    Алгоритм:
-      - рекурсивно ищем все файлы в BOOKS_DIR_STORAGE;
-      - для каждого файла:
-          * парсим путь в BookData;
-          * находим/создаём Genre;
-          * находим/создаём Book;
-          * находим/создаём BookFile (формат + относительный путь).
+def storage_path(rel_path: str | Path) -> Path:
+    """
+    Полный путь файла хранилища: из первого корня, где он есть.
+    """
+    roots = storage_roots()
+    if len(roots) > 1:
+        for root in roots:
+            full_path = root / rel_path
+            if full_path.exists():
+                return full_path
+    return roots[0] / rel_path
+
+
+def _walk(
+    root: Path,
+    rel_dir: str,
+    stop: threading.Event | None = None,
+) -> Iterator[tuple[str, FileStat]]:
+    """
+    Обходит подкаталог rel_dir корня root через os.scandir и отдаёт снимки
+    файлов по относительному POSIX-пути. Снимок берётся из DirEntry:
+    тип записи известен из самого листинга, отдельный stat нужен только
+    файлам. Скрытые файлы (например, недописанные ".*.part" при импорте)
+    и каталоги, которых нет в этом корне, пропускаются.
+    """
+    stack = [(str(root / rel_dir), f"{rel_dir}/" if rel_dir else "")]
+    while stack:
+        if stop is not None and stop.is_set():
+            return
+        dir_path, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                rel_path = f"{rel_dir}{entry.name}"
+                if entry.is_dir():
+                    stack.append((entry.path, f"{rel_path}/"))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    yield rel_path, (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def _scan_tree(rel_dir: str, roots: List[Path]) -> Dict[str, FileStat]:
+    files: Dict[str, FileStat] = {}
+    for root in roots:
+        for rel_path, stat in _walk(root, rel_dir):
+            files.setdefault(rel_path, stat)
+    return files
+
+
+def _list_top_level(roots: List[Path]) -> tuple[Dict[str, FileStat], List[str]]:
+    """
+    Файлы прямо в корнях хранилища и имена каталогов верхнего уровня
+    (жанров) во всех корнях. Отсутствующий корень — ошибка: иначе его
+    файлы посчитались бы удалёнными.
     """
-    if not BOOKS_DIR_STORAGE.exists():
-        raise ValueError(f"Директория {BOOKS_DIR_STORAGE} не существует")
+    files: Dict[str, FileStat] = {}
+    dirs: Set[str] = set()
+    for root in roots:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    dirs.add(entry.name)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files.setdefault(entry.name, (stat.st_size, stat.st_mtime_ns, stat.st_ino))
+    return files, sorted(dirs)
+
+
+def scan_storage(rel_dir: str = "") -> Dict[str, FileStat]:
+    """
+    Снимки всех файлов хранилища (или его подкаталога rel_dir) по
+    относительному POSIX-пути. Если путь есть в нескольких корнях,
+    берётся первый. Всё хранилище обходится в SYNC_SCAN_WORKERS потоков,
+    по каталогу верхнего уровня на задачу.
+    """
+    roots = storage_roots()
+    if rel_dir:
+        return _scan_tree(rel_dir, roots)
+
+    files, dirs = _list_top_level(roots)
+    with ThreadPoolExecutor(max_workers=SYNC_SCAN_WORKERS) as executor:
+        for tree in executor.map(_scan_tree, dirs, repeat(roots)):
+            files.update(tree)
+    return files
+
+
+# Конец обхода в очереди scan_storage_chunks
+_SCAN_DONE = object()
 
-    async with async_session_factory() as session:
-        for file_path in BOOKS_DIR_STORAGE.rglob("*"):
-            if not file_path.is_file():
-                continue
 
+@asynccontextmanager
+async def scan_storage_chunks() -> AsyncIterator[AsyncIterator[Dict[str, FileStat]]]:
+    """
+    Обходит хранилище в фоне и отдаёт снимки файлов пачками
+    по SYNC_CHUNK_SIZE, пока обход ещё идёт:
+
+        async with scan_storage_chunks() as chunks:
+            async for chunk in chunks:
+                ...
+
+    Каталоги верхнего уровня обходятся параллельно в SYNC_SCAN_WORKERS
+    потоках (каталог — во всех корнях по порядку). Пачки складываются
+    в asyncio.Queue на SYNC_SCAN_QUEUE_SIZE пачек: если получатель
+    (запись в БД) отстаёт, потоки обхода ждут. Путь, который есть
+    в нескольких корнях, может прийти повторно — учитывать нужно первый.
+    """
+    roots = storage_roots()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SYNC_SCAN_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(chunk: Dict[str, FileStat]) -> None:
+        # Вызывается из потока обхода: ждём места в очереди, пока обход нужен
+        future = asyncio.run_coroutine_threadsafe(queue.put(chunk), loop)
+        while not stop.is_set():
             try:
-                book_data = parse_file_path(file_path)
-            except ValueError as e:
-                print(f"Ошибка при разборе файла {file_path}: {e}")
-                continue
+                future.result(timeout=0.1)
+                return
+            except TimeoutError:
+                pass
+        future.cancel()
+
+    def scan_dir(rel_dir: str) -> None:
+        chunk: Dict[str, FileStat] = {}
+        for root in roots:
+            for rel_path, stat in _walk(root, rel_dir, stop):
+                chunk.setdefault(rel_path, stat)
+                if len(chunk) >= SYNC_CHUNK_SIZE:
+                    put(chunk)
+                    chunk = {}
+        if chunk:
+            put(chunk)
+
+    async def produce() -> None:
+        executor = ThreadPoolExecutor(max_workers=SYNC_SCAN_WORKERS)
+        try:
+            files, dirs = await asyncio.to_thread(_list_top_level, roots)
+            if files:
+                await queue.put(files)
+            results = await asyncio.gather(
+                *(loop.run_in_executor(executor, scan_dir, rel_dir) for rel_dir in dirs),
+                return_exceptions=True,
+            )
+            errors = [result for result in results if isinstance(result, Exception)]
+            await queue.put(errors[0] if errors else _SCAN_DONE)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            executor.shutdown(wait=False)
+
+    async def chunks() -> AsyncIterator[Dict[str, FileStat]]:
+        while True:
+            item = await queue.get()
+            if item is _SCAN_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    producer = asyncio.create_task(produce())
+    try:
+        yield chunks()
+    finally:
+        stop.set()
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+
+async def _remove_book_files(session: AsyncSession, file_ids: Iterable[int]) -> None:
+    """
+    Удаляет записи BookFile, а затем оставшиеся без файлов книги
+    и оставшиеся без книг жанры, к которым они относились.
+    """
+    file_ids = list(file_ids)
+    if not file_ids:
+        return
+
+    book_ids = set((await session.scalars(
+        select(BookFile.book_id).where(BookFile.id.in_(file_ids))
+    )).all())
+    await session.execute(delete(BookFile).where(BookFile.id.in_(file_ids)))
+
+    empty_books = (Book.id.in_(book_ids), ~Book.files.any())
+    genre_ids = set((await session.scalars(
+        select(Book.genre_id).where(*empty_books)
+    )).all())
+    await session.execute(delete(Book).where(*empty_books))
+    await session.execute(
+        delete(Genre).where(Genre.id.in_(genre_ids), ~Genre.books.any())
+    )
+    _mark_catalog_changed(session)
 
-            genre = await get_or_create_genre(session, book_data.genre)
-            book = await get_or_create_book(session, genre, book_data)
-            rel_path = str(file_path.relative_to(BOOKS_DIR_STORAGE)).replace("\\", "/")
-            await get_or_create_book_file(session, book, book_data.format, rel_path)
 
-        await session.commit()
\ No newline at end of file
+def _over_prune_limit(orphans: int, total_files: int) -> bool:
+    """
+    Слишком ли много файлов исчезло разом: скорее всего, это не удаление
+    книг, а не смонтированный или пустой корень хранилища.
+    """
+    return orphans >= SYNC_PRUNE_MIN_FILES and orphans > total_files * SYNC_PRUNE_MAX_FRACTION
+
+
+@dataclass(slots=True)
+class _ManifestEntry:
+    """
+    Запись BookFile из предыдущей синхронизации.
+    """
+    path: str
+    id: int
+    book_id: int
+    format: str
+    stat: FileStat
+    telegram_file_id: str | None
+
+
+@dataclass(slots=True)
+class _Catalog:
+    """
+    Справочники для пакетной регистрации: id жанров по имени, id книг по
+    (genre_id, title, author), записи манифеста по (book_id, format)
+    и пути файлов, записанных за эту синхронизацию, по (book_id, format).
+    """
+    genre_ids: Dict[str, int]
+    book_ids: Dict[tuple[int, str, str], int]
+    files: Dict[tuple[int, str], _ManifestEntry]
+    registered: Dict[tuple[int, str], str] = field(default_factory=dict)
+
+
+def _chunks(items: list, size: int = SYNC_CHUNK_SIZE) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def _register_per_file(
+    session: AsyncSession,
+    added: Dict[str, BookData],
+    scanned: Dict[str, FileStat],
+    renamed_file_ids: Dict[FileStat, str],
+) -> tuple[Set[int], Set[str]]:
+    """
+    Регистрирует новые файлы по одному через get_or_create_*.
+    Возвращает id записей BookFile, в которые они записаны, и пути
+    дубликатов, оставшихся незарегистрированными (см. _is_duplicate).
+    """
+    kept_ids = set()
+    duplicates = set()
+    for rel_path, book_data in added.items():
+        size, mtime_ns, inode = scanned[rel_path]
+        genre = await get_or_create_genre(session, book_data.genre)
+        book = await get_or_create_book(session, genre, book_data)
+        bf = await get_or_create_book_file(
+            session,
+            book,
+            book_data.format,
+            rel_path,
+            size=size,
+            mtime_ns=mtime_ns,
+            inode=inode,
+        )
+        if bf.path != rel_path:
+            duplicates.add(rel_path)
+            continue
+        if bf.telegram_file_id is None:
+            bf.telegram_file_id = renamed_file_ids.get(scanned[rel_path])
+        # Запись могла достаться от старого пути той же книги и формата
+        kept_ids.add(bf.id)
+    return kept_ids, duplicates
+
+
+async def _register_bulk(
+    session: AsyncSession,
+    added: Dict[str, BookData],
+    scanned: Dict[str, FileStat],
+    catalog: _Catalog,
+    renamed_file_ids: Dict[FileStat, str],
+) -> tuple[Set[int], Set[str]]:
+    """
+    Пакетно регистрирует новые файлы.
+
+    Жанры, книги и файлы берутся из словарей catalog (загружаются один
+    раз за синхронизацию, файлы уже есть в манифесте), недостающие строки
+    вычисляются в памяти и пишутся многострочными INSERT ... ON CONFLICT
+    пачками по SYNC_CHUNK_SIZE с коммитом на каждую пачку. Возвращает id
+    записей BookFile, в которые записаны новые файлы, и пути дубликатов,
+    оставшихся незарегистрированными (см. _is_duplicate).
+    """
+    genre_ids, book_ids, files = catalog.genre_ids, catalog.book_ids, catalog.files
+
+    # Если сопоставление строк в СУБД не различает регистр или "ё"/"е"
+    # (MySQL *_ci), вставка строки, отличающейся от существующей только
+    # написанием, пропускается, а IN возвращает строку в написании БД.
+    # Такие ключи дочитываем по одному — сравнением на стороне БД, как
+    # get_or_create_*.
+
+    # Жанры
+    genre_names = {GENRE_MAP.get(data.genre, data.genre) for data in added.values()}
+    missing_genres = sorted(genre_names - genre_ids.keys())
+    if missing_genres:
+        await session.execute(insert_on_conflict(
+            Genre.__table__, [{"name": name} for name in missing_genres], ["name"],
+        ))
+        genre_ids.update((await session.execute(
+            select(Genre.name, Genre.id).where(Genre.name.in_(missing_genres))
+        )).all())
+        for name in missing_genres:
+            if name not in genre_ids:
+                genre_ids[name] = await session.scalar(select(Genre.id).where(Genre.name == name))
+        await session.commit()
+        _mark_catalog_changed(session)
+
+    def book_key(data: BookData) -> tuple[int, str, str]:
+        return genre_ids[GENRE_MAP.get(data.genre, data.genre)], data.title, data.author
+
+    # Книги
+    missing_books = sorted({book_key(data) for data in added.values()} - book_ids.keys())
+    for chunk in _chunks(missing_books):
+        await session.execute(insert_on_conflict(
+            Book.__table__,
+            [{"genre_id": genre_id, "title": title, "author": author} for genre_id, title, author in chunk],
+            ["genre_id", "title", "author"],
+        ))
+        result = await session.execute(
+            select(Book.id, Book.genre_id, Book.title, Book.author).
+            where(tuple_(Book.genre_id, Book.title, Book.author).in_(chunk))
+        )
+        book_ids.update({(genre_id, title, author): book_id for book_id, genre_id, title, author in result})
+        for genre_id, title, author in chunk:
+            if (genre_id, title, author) not in book_ids:
+                book_ids[genre_id, title, author] = await session.scalar(
+                    select(Book.id).where(
+                        Book.genre_id == genre_id, Book.title == title, Book.author == author,
+                    )
+                )
+        await session.commit()
+        _mark_catalog_changed(session)
+
+    # Файлы: у существующей пары (книга, формат) меняется путь, остальные вставляются
+    updates: Dict[int, dict] = {}
+    inserts: Dict[tuple[int, str], dict] = {}
+    duplicates: Set[str] = set()
+    for rel_path, data in added.items():
+        stat = scanned[rel_path]
+        key = (book_ids[book_key(data)], data.format)
+        values = {"path": rel_path, "size": stat[0], "mtime_ns": stat[1], "inode": stat[2]}
+        existing = files.get(key)
+        if key in catalog.registered:
+            # Книга и формат уже получили файл за эту синхронизацию
+            _warn_duplicate(catalog.registered[key], rel_path)
+            duplicates.add(rel_path)
+            continue
+        if existing is not None and _is_duplicate(existing.path, rel_path):
+            duplicates.add(rel_path)
+            continue
+
+        catalog.registered[key] = rel_path
+        if existing is not None:
+            telegram_file_id = existing.telegram_file_id if existing.stat[:2] == stat[:2] else None
+            updates[existing.id] = {
+                "id": existing.id,
+                **values,
+                "telegram_file_id": telegram_file_id or renamed_file_ids.get(stat),
+            }
+        else:
+            inserts[key] = {
+                "book_id": key[0],
+                "format": key[1],
+                **values,
+                "telegram_file_id": renamed_file_ids.get(stat),
+            }
+
+    for chunk in _chunks(list(updates.values())):
+        await session.execute(update(BookFile), chunk)
+        await session.commit()
+
+    for chunk in _chunks(list(inserts.values())):
+        await session.execute(insert_on_conflict(
+            BookFile.__table__,
+            chunk,
+            ["book_id", "format"],
+            update_columns=("path", "size", "mtime_ns", "inode", "telegram_file_id"),
+        ))
+        await session.commit()
+
+    if updates or inserts:
+        _mark_catalog_changed(session)
+    return set(updates), duplicates
+
+
+async def _load_manifest(session: AsyncSession, *where) -> Dict[str, _ManifestEntry]:
+    """
+    Записи BookFile (все или подходящие под условия where) по пути.
+    """
+    result = await session.execute(
+        select(
+            BookFile.id,
+            BookFile.book_id,
+            BookFile.format,
+            BookFile.path,
+            BookFile.size,
+            BookFile.mtime_ns,
+            BookFile.inode,
+            BookFile.telegram_file_id,
+        ).where(*where)
+    )
+    return {
+        path: _ManifestEntry(path, file_id, book_id, format_, (size, mtime_ns, inode), telegram_file_id)
+        for file_id, book_id, format_, path, size, mtime_ns, inode, telegram_file_id in result
+    }
+
+
+async def _load_catalog(session: AsyncSession, manifest: Dict[str, _ManifestEntry] | None) -> _Catalog:
+    """
+    Загружает справочники для _register_bulk. Записи файлов берутся из
+    manifest, если он описывает всё хранилище, иначе (None) — из БД.
+    """
+    if manifest is None:
+        manifest = await _load_manifest(session)
+    genre_ids = dict((await session.execute(select(Genre.name, Genre.id))).all())
+    book_ids = {
+        (genre_id, title, author): book_id
+        for book_id, genre_id, title, author in await session.execute(
+            select(Book.id, Book.genre_id, Book.title, Book.author)
+        )
+    }
+    files = {(entry.book_id, entry.format): entry for entry in manifest.values()}
+    return _Catalog(genre_ids, book_ids, files)
+
+
+async def _iter_chunks(scanned: Dict[str, FileStat]) -> AsyncIterator[Dict[str, FileStat]]:
+    for chunk in _chunks(list(scanned.items())):
+        yield dict(chunk)
+
+
+async def _apply_scan(
+    session: AsyncSession,
+    chunks: AsyncIterator[Dict[str, FileStat]],
+    manifest: Dict[str, _ManifestEntry],
+    bulk: bool,
+    partial: bool = False,
+) -> SyncStats:
+    """
+    Приводит записи manifest в соответствие со снимками файлов, которые
+    приходят пачками chunks (оба описывают одну и ту же часть хранилища,
+    partial=True — не всё хранилище), и коммитит изменения. Каждая пачка записывается сразу, пока следующие
+    ещё сканируются; исчезнувшие файлы удаляются в конце.
+
+    Переименованный файл (тот же inode, размер и mtime, что у известного
+    файла с telegram_file_id) получает его telegram_file_id: содержимое то же.
+    Новый файл той же книги и формата, что и файл, который остался на месте,
+    не регистрируется (см. _is_duplicate).
+    """
+    renamed_file_ids = {
+        entry.stat: entry.telegram_file_id
+        for entry in manifest.values()
+        if entry.telegram_file_id is not None and entry.stat[2] is not None
+    }
+    catalog: _Catalog | None = None
+    stats = SyncStats()
+    seen: Set[str] = set()
+    kept_ids: Set[int] = set()
+
+    async for scanned in chunks:
+        # Путь из следующего корня хранилища перекрыт уже учтённым
+        scanned = {path: stat for path, stat in scanned.items() if path not in seen}
+        seen.update(scanned)
+
+        added: Dict[str, BookData] = {}
+        modified = []
+        for rel_path, stat in scanned.items():
+            entry = manifest.get(rel_path)
+            if entry is None:
+                try:
+                    added[rel_path] = parse_file_path(BOOKS_DIR_STORAGE / rel_path)
+                except ValueError as e:
+                    print(f"Ошибка при разборе файла {rel_path}: {e}")
+                continue
+            if stat == entry.stat:
+                continue
+            # Изменившийся файл: обновляем снимок пакетным UPDATE
+            values = {"id": entry.id, "size": stat[0], "mtime_ns": stat[1], "inode": stat[2]}
+            if stat[:2] != entry.stat[:2] and entry.telegram_file_id is not None:
+                values["telegram_file_id"] = None
+                _mark_catalog_changed(session)
+            modified.append(values)
+        for chunk in _chunks(modified):
+            await session.execute(update(BookFile), chunk)
+
+        if added and bulk:
+            await session.commit()
+            if catalog is None:
+                catalog = await _load_catalog(session, None if partial else manifest)
+            registered, duplicates = await _register_bulk(
+                session, added, scanned, catalog, renamed_file_ids,
+            )
+        elif added:
+            registered, duplicates = await _register_per_file(session, added, scanned, renamed_file_ids)
+        else:
+            registered, duplicates = set(), set()
+        await session.commit()
+        kept_ids |= registered
+
+        stats.added += len(added) - len(duplicates)
+        stats.duplicates += len(duplicates)
+        stats.modified += len(modified)
+        stats.unchanged += len(scanned) - len(added) - len(modified)
+
+    removed = [entry for path, entry in manifest.items() if path not in seen]
+    orphan_ids = [entry.id for entry in removed if entry.id not in kept_ids]
+    if orphan_ids:
+        total_files = await session.scalar(select(func.count()).select_from(BookFile))
+        if _over_prune_limit(len(orphan_ids), total_files):
+            print(
+                f"Синхронизация: {len(orphan_ids)} из {total_files} файлов каталога нет "
+                f"в хранилище — записи не удалены. Проверьте, что хранилище смонтировано; "
+                f"удалить их можно командой /prune"
+            )
+            stats.orphaned = len(orphan_ids)
+            orphan_ids = []
+    for chunk in _chunks(orphan_ids):
+        await _remove_book_files(session, chunk)
+        await session.commit()
+    # Записи из kept_ids (переименования и перемещения) не удалены, а перенесены
+    stats.removed = len(orphan_ids)
+    return stats
+
+
+async def sync_book_from_fs(bulk: bool = SYNC_BULK) -> SyncStats:
+    """
+    Инкрементально синхронизирует содержимое хранилища (BOOKS_DIR_STORAGE
+    и BOOKS_DIR_EXTRA_STORAGES) с БД.
+
+    Манифест предыдущей синхронизации — сами записи BookFile
+    (путь, размер, mtime_ns, inode). Алгоритм:
+      - обходим корни хранилища через os.scandir в пуле потоков, снимая
+        (size, mtime_ns, inode) (см. scan_storage_chunks);
+      - одним запросом загружаем манифест из БД, пока идёт обход;
+      - снимки обрабатываем пачками по мере обхода:
+        - неизменившиеся файлы пропускаем без запросов к БД;
+        - у изменившихся обновляем снимок; если поменялись размер или
+          время изменения, сбрасываем telegram_file_id;
+        - новые файлы разбираем и регистрируем (Genre/Book/BookFile): при
+          bulk=True пакетно (см. _register_bulk), иначе по одному; если
+          новый путь — это переименованный файл (тот же inode, размер
+          и mtime), переносим на него telegram_file_id;
+      - после обхода записи исчезнувших файлов удаляем вместе с опустевшими книгами и жанрами;
+      - если что-то изменилось, увеличиваем номер поколения каталога,
+        чтобы сбросить зависящие от него кэши.
+    """
+    for root in storage_roots():
+        if not root.exists():
+            raise ValueError(f"Директория {root} не существует")
+
+    async with sync_lock:
+        async with async_session_factory() as session, scan_storage_chunks() as chunks:
+            manifest = await _load_manifest(session)
+            stats = await _apply_scan(session, chunks, manifest, bulk)
+            print(
+                f"Синхронизация: новых {stats.added}, изменённых {stats.modified}, "
+                f"удалённых {stats.removed}, без изменений {stats.unchanged}"
+            )
+            if session.info.get("catalog_changed"):
+                bump_catalog_version()
+        return stats
+
+
+async def sync_paths(rel_paths: Iterable[str]) -> SyncStats:
+    """
+    Синхронизирует с БД только указанные пути хранилища (относительные
+    POSIX-пути от корней хранилища, "" — всё хранилище), например,
+    изменения, о которых сообщил наблюдатель за файловой системой.
+
+    Существующий файл снимается одним stat, существующий каталог
+    обходится целиком, исчезнувший путь считается удалённым файлом или
+    каталогом. Из БД загружаются только записи BookFile этих путей
+    и каталогов, так что перемещение внутри набора путей распознаётся
+    как переименование, а остальное хранилище не затрагивается.
+    """
+    rel_paths = set(rel_paths)
+    if "" in rel_paths:
+        return await sync_book_from_fs()
+
+    async with sync_lock:
+        scanned: Dict[str, FileStat] = {}
+        files: Set[str] = set()
+        dirs: Set[str] = set()
+        for rel_path in rel_paths:
+            try:
+                stat = await asyncio.to_thread(storage_path(rel_path).stat)
+            except FileNotFoundError:
+                # Удалён файл или каталог — неизвестно, что именно
+                files.add(rel_path)
+                dirs.add(rel_path)
+                continue
+            if S_ISDIR(stat.st_mode):
+                dirs.add(rel_path)
+                scanned.update(await asyncio.to_thread(scan_storage, rel_path))
+            elif S_ISREG(stat.st_mode):
+                files.add(rel_path)
+                scanned[rel_path] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+        async with async_session_factory() as session:
+            manifest: Dict[str, _ManifestEntry] = {}
+            for chunk in _chunks(sorted(files)):
+                manifest.update(await _load_manifest(session, BookFile.path.in_(chunk)))
+            for chunk in _chunks(sorted(dirs)):
+                manifest.update(await _load_manifest(session, or_(*(
+                    BookFile.path.startswith(f"{rel_dir}/", autoescape=True) for rel_dir in chunk
+                ))))
+
+            # Небольшие пачки дешевле регистрировать по одному файлу,
+            # чем загружать в память все жанры и книги
+            bulk = SYNC_BULK and len(scanned.keys() - manifest.keys()) >= SYNC_CHUNK_SIZE
+            stats = await _apply_scan(session, _iter_chunks(scanned), manifest, bulk, partial=True)
+            if session.info.get("catalog_changed"):
+                bump_catalog_version()
+        return stats
+
+
+async def prune_orphans(dry_run: bool = True, force: bool = False) -> PruneReport:
+    """
+    Удаляет из каталога записи BookFile, файлов которых нет ни в одном
+    корне хранилища (разность путей в БД и путей на диске), пачками по
+    SYNC_CHUNK_SIZE, а затем книги без файлов и жанры без книг — в том
+    числе оставшиеся пустыми раньше.
+
+    При dry_run=True (по умолчанию) ничего не удаляет, только считает.
+    Если исчезло больше SYNC_PRUNE_MAX_FRACTION файлов каталога, удаление
+    выполняется только с force=True.
+    """
+    for root in storage_roots():
+        if not root.exists():
+            raise ValueError(f"Директория {root} не существует")
+
+    async with sync_lock:
+        scanned = await asyncio.to_thread(scan_storage)
+
+        async with async_session_factory() as session:
+            manifest = await _load_manifest(session)
+            orphans = sorted(path for path in manifest if path not in scanned)
+
+            # Что опустеет: книги без оставшихся файлов, жанры без оставшихся книг
+            files_left = Counter(
+                entry.book_id for path, entry in manifest.items() if path in scanned
+            )
+            books = (await session.execute(select(Book.id, Book.genre_id))).all()
+            empty_books = {book_id for book_id, _ in books if not files_left[book_id]}
+            books_left = Counter(
+                genre_id for book_id, genre_id in books if book_id not in empty_books
+            )
+            genre_ids = (await session.scalars(select(Genre.id))).all()
+
+            report = PruneReport(
+                files=len(orphans),
+                books=len(empty_books),
+                genres=sum(1 for genre_id in genre_ids if not books_left[genre_id]),
+                total_files=len(manifest),
+                examples=orphans[:10],
+                over_limit=_over_prune_limit(len(orphans), len(manifest)),
+                dry_run=dry_run,
+            )
+            if dry_run or (report.over_limit and not force):
+                return report
+
+            for chunk in _chunks([manifest[path].id for path in orphans]):
+                await _remove_book_files(session, chunk)
+                await session.commit()
+            # Книги и жанры, опустевшие раньше (например, удалённые вручную файлы)
+            if report.books or report.genres:
+                await session.execute(delete(Book).where(~Book.files.any()))
+                await session.execute(delete(Genre).where(~Genre.books.any()))
+                _mark_catalog_changed(session)
+            await session.commit()
+            report.pruned = True
+
+            if session.info.get("catalog_changed"):
+                bump_catalog_version()
+        return report
+
+
+def prune_report(report: PruneReport) -> str:
+    """
+    Текстовый отчёт об очистке каталога для администратора.
+    """
+    if report.dry_run:
+        title = PRUNE_DRY_RUN
+    elif report.pruned:
+        title = PRUNE_DONE
+    else:
+        title = PRUNE_ABORTED
+    text = PRUNE_REPORT.format(
+        title=title,
+        files=report.files,
+        total_files=report.total_files,
+        books=report.books,
+        genres=report.genres,
+    )
+    if report.over_limit and not report.pruned:
+        text += "\n\n" + PRUNE_OVER_LIMIT.format(max_percent=round(SYNC_PRUNE_MAX_FRACTION * 100))
+    if report.examples:
+        text += "\n\n" + "\n".join(
+            PRUNE_EXAMPLE.format(path=html.escape(path)) for path in report.examples
+        )
+    return text
@@ -0,0 +1,175 @@
+import asyncio
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from app.services.delivery import schedule_delivery_variants
+from app.services.file_sync import FileStat, scan_storage, storage_roots, sync_paths
+from app.services.similar import schedule_similar_refresh
+from ..config.storage import (
+    WATCH_DEBOUNCE_SECONDS,
+    WATCH_FORCE_POLLING,
+    WATCH_MAX_BATCH_SECONDS,
+    WATCH_POLL_INTERVAL,
+    WATCH_STORAGE,
+)
+
+try:
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+_watch_task: Optional[asyncio.Task] = None
+
+# Пути, о которых сообщили помимо наблюдателя (см. schedule_path_sync)
+_sync_task: Optional[asyncio.Task] = None
+_sync_pending: Set[str] = set()
+
+
+def _rel_path(path: str) -> Optional[str]:
+    """
+    Относительный POSIX-путь события ("" — корень хранилища) или None
+    для путей вне хранилища и скрытых файлов (недописанные ".*.part").
+    """
+    for root in storage_roots():
+        try:
+            rel_path = Path(path).relative_to(root)
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+    if any(part.startswith(".") for part in rel_path.parts):
+        return None
+    return rel_path.as_posix() if rel_path.parts else ""
+
+
+async def _apply_changes(rel_paths: Set[str]) -> bool:
+    """
+    Применяет к БД изменения указанных путей. Возвращает False, если
+    синхронизация не удалась (пути нужно будет применить ещё раз).
+    """
+    try:
+        stats = await sync_paths(rel_paths)
+    except Exception as e:
+        print(f"Ошибка при синхронизации изменений хранилища: {e}")
+        return False
+    if stats.changed:
+        print(
+            f"Хранилище изменилось: новых {stats.added}, изменённых {stats.modified}, "
+            f"удалённых {stats.removed}"
+        )
+        schedule_delivery_variants()
+    if stats.added or stats.removed:
+        schedule_similar_refresh()
+    return True
+
+
+async def _sync_in_background() -> None:
+    while _sync_pending:
+        rel_paths = set(_sync_pending)
+        _sync_pending.clear()
+        if not await _apply_changes(rel_paths):
+            break
+
+
+def schedule_path_sync(rel_paths: Iterable[str]) -> None:
+    """
+    Синхронизирует указанные пути в фоне — например, файл, который не
+    нашёлся на диске при отправке. Вызывающий не ждёт, пока освободится
+    sync_lock (его может надолго занять полная синхронизация или импорт).
+    Пути, добавленные во время синхронизации, применяются следующей пачкой.
+    """
+    global _sync_task
+    _sync_pending.update(rel_paths)
+    if _sync_task is None or _sync_task.done():
+        _sync_task = asyncio.create_task(_sync_in_background())
+
+
+async def _watch_events() -> None:
+    """
+    Получает события файловой системы через watchfiles. Серии событий
+    склеиваются в пачку, пока в течение WATCH_DEBOUNCE_SECONDS приходят новые,
+    но не дольше WATCH_MAX_BATCH_SECONDS от первого события.
+
+    В терминах watchfiles step — окно тишины, после которого пачка
+    отдаётся, а debounce — предельная длительность пачки.
+    """
+    pending: Set[str] = set()
+    async for changes in watchfiles.awatch(
+        *storage_roots(),
+        watch_filter=lambda change, path: _rel_path(path) is not None,
+        debounce=int(max(WATCH_MAX_BATCH_SECONDS, WATCH_DEBOUNCE_SECONDS) * 1000),
+        step=int(WATCH_DEBOUNCE_SECONDS * 1000),
+    ):
+        pending.update(_rel_path(path) for _, path in changes)
+        if await _apply_changes(pending):
+            pending.clear()
+
+
+def _changed_paths(old: Dict[str, FileStat], new: Dict[str, FileStat]) -> Set[str]:
+    return {path for path, _ in old.items() ^ new.items()}
+
+
+async def _poll_changes() -> None:
+    """
+    Опрашивает хранилище раз в WATCH_POLL_INTERVAL секунд: снимки
+    os.scandir сравниваются в памяти, в БД уходят только изменившиеся
+    пути. Пока файлы продолжают меняться, хранилище переснимается каждые
+    WATCH_DEBOUNCE_SECONDS (но не дольше WATCH_MAX_BATCH_SECONDS),
+    и изменения применяются одной пачкой.
+    """
+    loop = asyncio.get_running_loop()
+    snapshot = await asyncio.to_thread(scan_storage)
+    while True:
+        await asyncio.sleep(WATCH_POLL_INTERVAL)
+        current = await asyncio.to_thread(scan_storage)
+        changed = _changed_paths(snapshot, current)
+        deadline = loop.time() + WATCH_MAX_BATCH_SECONDS
+        while changed and loop.time() < deadline:
+            await asyncio.sleep(WATCH_DEBOUNCE_SECONDS)
+            latest = await asyncio.to_thread(scan_storage)
+            more = _changed_paths(current, latest)
+            current = latest
+            if not more:
+                break
+            changed |= more
+        # Если применить не удалось, те же изменения найдутся при следующем опросе
+        if not changed or await _apply_changes(changed):
+            snapshot = current
+
+
+async def _watch() -> None:
+    while True:
+        try:
+            if watchfiles is not None and not WATCH_FORCE_POLLING:
+                await _watch_events()
+            else:
+                await _poll_changes()
+        except Exception as e:
+            print(f"Ошибка наблюдения за хранилищем: {e}")
+        await asyncio.sleep(WATCH_POLL_INTERVAL)
+
+
+def start_storage_watcher() -> None:
+    """
+    Запускает фоновую задачу, которая следит за корнями хранилища
+    и вносит в каталог только изменившиеся файлы (вызывается после
+    начальной синхронизации).
+    """
+    global _watch_task
+    if WATCH_STORAGE and _watch_task is None:
+        _watch_task = asyncio.create_task(_watch())
+
+
+async def stop_storage_watcher() -> None:
+    """
+    Останавливает наблюдение за хранилищем (вызывается при остановке бота).
+    """
+    global _watch_task
+    if _watch_task is not None:
+        _watch_task.cancel()
+        try:
+            await _watch_task
+        except asyncio.CancelledError:
+            pass
+        _watch_task = None
@@ -0,0 +1,42 @@
+import re
+import threading
+from functools import lru_cache
+from typing import List
+
+import snowballstemmer
+
+_RUSSIAN_STEMMER = snowballstemmer.stemmer("russian")
+_ENGLISH_STEMMER = snowballstemmer.stemmer("english")
+# Стеммеры хранят состояние разбора текущего слова, а индекс поиска
+# строится в отдельном потоке — вызываем их по одному
+_STEMMER_LOCK = threading.Lock()
+
+_CYRILLIC_RE = re.compile(r"[а-я]")
+
+
+def fold_yo(text: str) -> str:
+    """
+    Сводит "ё" к "е", чтобы "ёлка" и "елка" считались одним словом.
+    """
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+@lru_cache(maxsize=200_000)
+def stem_word(word: str) -> str:
+    """
+    Возвращает основу слова (Snowball): "войны" и "война" -> "войн".
+
+    Слово должно быть уже в нижнем регистре и со свёрнутой "ё".
+    Кириллические слова идут через русский стеммер, остальные — через английский.
+    Результат кэшируется: словарь каталога ограничен, а слова повторяются постоянно.
+    """
+    stemmer = _RUSSIAN_STEMMER if _CYRILLIC_RE.search(word) else _ENGLISH_STEMMER
+    with _STEMMER_LOCK:
+        return stemmer.stemWord(word)
+
+
+def stem_words(words: List[str]) -> List[str]:
+    """
+    Основы для списка уже нормализованных слов (порядок сохраняется).
+    """
+    return [stem_word(word) for word in words]
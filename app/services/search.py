@@ -1,18 +1,37 @@
+import asyncio
 import re
-from typing import List, Tuple, Set
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Set
 
-from rapidfuzz import fuzz
-from sqlalchemy import or_, select, func
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import func, literal, or_, select
 
 from app.config.search import (
     AUTHOR_WEIGHT,
     CANDIDATES_LIMIT,
+    SEARCH_BACKEND,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL,
+    SEARCH_EXECUTOR,
+    SEARCH_EXECUTOR_WORKERS,
     SEARCH_LIMIT,
     SEARCH_MIN_SCORE,
+    SEARCH_PAGES_CACHE_SIZE,
+    SEARCH_PAGES_TTL,
+    SEARCH_PG_MIN_SIMILARITY,
+    SEARCH_PREFIX_CACHE_SIZE,
+    SEARCH_PREFIX_CACHE_TTL,
+    SEARCH_SCORING_WORKERS,
     TITLE_WEIGHT,
 )
-from app.models.book import Book
-from app.models.db import async_session_factory
+from app.models.book import Book, book_search_vector, folded_lower
+from app.models.db import async_session_factory, engine
+from app.models.records import BOOK_RECORD_COLUMNS, BookRecord
+from app.services.cache import TTLCache
+from app.services.catalog_version import get_catalog_version
+from app.services.normalize import fold_yo
+from app.services.search_index import ensure_search_index, get_search_index
 
 
 # Русские (и общие) стоп‑слова, которые не будем учитывать при поиске кандидатов
@@ -22,75 +41,181 @@ STOPWORDS: Set[str] = {
     "из", "от", "до", "для", "при", "его", "ее", "ее", "ли", "бы"
 }
 
+# Кэш готовых результатов search_books; сбрасывается при смене поколения каталога
+_search_cache: TTLCache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+# Полные ранжирования для постраничного вывода: (user_id, handle) -> (запрос, [book_id])
+_rankings: TTLCache = TTLCache(maxsize=SEARCH_PAGES_CACHE_SIZE, ttl=SEARCH_PAGES_TTL)
+_ranking_counter = 0
+
+# Кандидаты последнего запроса "по мере набора": user_id -> (запрос, слова, кандидаты, загруженные книги)
+_prefix_candidates: TTLCache = TTLCache(maxsize=SEARCH_PREFIX_CACHE_SIZE, ttl=SEARCH_PREFIX_CACHE_TTL)
+
+# Пул для скоринга вне event loop (None — скоринг прямо в event loop)
+_executor: Optional[Executor] = None
+
 
 def _normalize_words(query: str) -> List[str]:
     """
-    Извлекаем слова из запроса, приводим к нижнему регистру,
+    Извлекаем слова из запроса, приводим к нижнему регистру, сворачиваем "ё" в "е",
     убираем короткие слова и стоп-слова.
     """
-    raw_words = re.findall(r"\w+", (query or "").lower(), flags=re.UNICODE)
+    raw_words = re.findall(r"\w+", fold_yo((query or "").lower()), flags=re.UNICODE)
     # Оставляем слова длиной >=3, убираем стоп-слова
     filtered = [w for w in raw_words if len(w) >= 3 and w not in STOPWORDS]
     return filtered
 
 
-async def _get_candidates_from_db(query: str) -> List[Book]:
+async def _get_candidates_from_postgres(query: str) -> List[BookRecord]:
+    """
+    Берём кандидатов средствами PostgreSQL: совпадение по tsvector (префиксный
+    to_tsquery по словам запроса) или по word_similarity из pg_trgm.
+    Оба условия обслуживаются GIN-индексами, а ранжирование (similarity + ts_rank)
+    выполняется в БД, так что наружу уходит не больше CANDIDATES_LIMIT лучших строк.
+    """
+    q_lower = fold_yo((query or "").strip().lower())
+    words = _normalize_words(query) or re.findall(r"\w+", q_lower, flags=re.UNICODE)
+    if not words:
+        return []
+
+    # Слова состоят только из \w, поэтому их можно безопасно склеить в tsquery
+    ts_query = func.to_tsquery("simple", " | ".join(f"{w}:*" for w in words))
+    title_lower = folded_lower(Book.title)
+    author_lower = folded_lower(Book.author)
+    q_param = literal(q_lower)
+
+    rank = (
+        func.greatest(
+            func.word_similarity(q_param, title_lower),
+            func.word_similarity(q_param, author_lower),
+        )
+        + func.ts_rank(book_search_vector, ts_query)
+    )
+
+    stmt = (
+        select(*BOOK_RECORD_COLUMNS)
+        .where(
+            or_(
+                book_search_vector.op("@@")(ts_query),
+                # "q <% text" — оператор word_similarity, использует GIN-индекс
+                q_param.op("<%")(title_lower),
+                q_param.op("<%")(author_lower),
+            )
+        )
+        .order_by(rank.desc())
+        .limit(CANDIDATES_LIMIT)
+    )
+
+    async with async_session_factory() as session:
+        await session.execute(
+            select(func.set_config(
+                "pg_trgm.word_similarity_threshold",
+                str(SEARCH_PG_MIN_SIMILARITY),
+                True,
+            ))
+        )
+        result = await session.execute(stmt)
+        return [BookRecord(*row) for row in result]
+
+
+async def _get_candidates_from_db(query: str) -> List[BookRecord]:
     """
     Берём кандидатов из БД по словам запроса, но игнорируем короткие и стоп-слова.
     Если после фильтрации слов ничего не осталось — делаем более широкую выборку по всей фразе.
+
+    В режиме "postgres" на PostgreSQL кандидаты ранжируются в самой БД
+    (см. _get_candidates_from_postgres), на остальных СУБД используется LIKE.
     """
+    if SEARCH_BACKEND == "postgres" and engine.dialect.name == "postgresql":
+        return await _get_candidates_from_postgres(query)
+
     words_filtered = _normalize_words(query)
     async with async_session_factory() as session:
         if words_filtered:
             conditions = []
             for w in words_filtered:
                 pattern = f"%{w}%"
-                conditions.append(func.lower(Book.title).like(pattern))
-                conditions.append(func.lower(Book.author).like(pattern))
+                conditions.append(folded_lower(Book.title).like(pattern))
+                conditions.append(folded_lower(Book.author).like(pattern))
 
             where_clause = or_(*conditions)
 
-            stmt = select(Book).where(where_clause).limit(CANDIDATES_LIMIT)
+            stmt = select(*BOOK_RECORD_COLUMNS).where(where_clause).limit(CANDIDATES_LIMIT)
             result = await session.execute(stmt)
-            books: List[Book] = list(result.scalars().all())
+            books: List[BookRecord] = [BookRecord(*row) for row in result]
             return books
 
         # Если в запросе только стоп-слова / одна буква и т.п
         # Ищем по всей фразе (вплоть до обычного LIKE '%query%')
-        q = (query or "").strip().lower()
+        q = fold_yo((query or "").strip().lower())
         if not q:
             return []
 
         stmt = (
-            select(Book)
+            select(*BOOK_RECORD_COLUMNS)
             .where(
                 or_(
-                    func.lower(Book.title).like(f"%{q}%"),
-                    func.lower(Book.author).like(f"%{q}%"),
+                    folded_lower(Book.title).like(f"%{q}%"),
+                    folded_lower(Book.author).like(f"%{q}%"),
                 )
             )
             .limit(CANDIDATES_LIMIT)
         )
         result = await session.execute(stmt)
-        books = list(result.scalars().all())
+        books = [BookRecord(*row) for row in result]
         return books
 
 
-def _score_book(query: str, book: Book) -> float:
+async def _get_candidates_from_index(query: str) -> List[BookRecord] | None:
+    """
+    Берём кандидатов из триграммного индекса в памяти, без обращения к БД.
+    Индекс перестраивается, если каталог изменился с момента его построения.
+    Возвращает None, если индекс не используется — тогда вызывающий код
+    берёт кандидатов из БД.
+    """
+    if SEARCH_BACKEND != "trigram":
+        return None
+    index = await ensure_search_index()
+
+    words = _normalize_words(query)
+    if not words:
+        # Как и в БД-варианте: если значимых слов нет, ищем по всей фразе
+        words = re.findall(r"\w+", fold_yo((query or "").lower()), flags=re.UNICODE)
+    return index.candidates(words, CANDIDATES_LIMIT)
+
+
+async def _load_books(book_ids: Sequence[int]) -> List[BookRecord]:
+    """
+    Загружает книги по списку id одним запросом, сохраняя порядок book_ids.
+    """
+    if not book_ids:
+        return []
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(*BOOK_RECORD_COLUMNS).where(Book.id.in_(book_ids))
+        )
+        by_id = {row.id: BookRecord(*row) for row in result}
+    return [by_id[book_id] for book_id in book_ids if book_id in by_id]
+
+
+def _score_book(query: str, book: BookRecord) -> float:
     """
     Комбинированный скор:
       - отдельно считаем метрики по title и author (несколько метрик RapidFuzz),
       - даём бонусы за точную фразу в названии и за совпавшие слова (не стоп-слова).
+
+    Поштучная (эталонная) версия: search_books использует пакетную
+    _score_books, которая обязана давать ровно те же значения.
     """
     q = (query or "").strip()
     if not q:
         return 0.0
 
-    q_lower = q.lower()
+    q_lower = fold_yo(q.lower())
     title = (book.title or "").strip()
     author = (book.author or "").strip()
-    title_lower = title.lower()
-    author_lower = author.lower()
+    title_lower = fold_yo(title.lower())
+    author_lower = fold_yo(author.lower())
 
     # Разные метрики RapidFuzz — берем максимум, чтобы учесть разные типы схожести
     title_ratios = [
@@ -134,32 +259,410 @@ def _score_book(query: str, book: Book) -> float:
     return total
 
 
+# Метрики RapidFuzz, максимум по которым берётся отдельно для title и author
+_SCORERS = (fuzz.WRatio, fuzz.token_set_ratio, fuzz.partial_ratio)
+
+
+def _max_ratio(query: str, choices: List[str]) -> np.ndarray:
+    """
+    Максимум метрик _SCORERS между запросом и каждой строкой choices.
+    Каждая метрика считается одним вызовом process.cdist по всем строкам сразу.
+    """
+    result: np.ndarray | None = None
+    for scorer in _SCORERS:
+        scores = process.cdist(
+            [query],
+            choices,
+            scorer=scorer,
+            dtype=np.float64,
+            workers=SEARCH_SCORING_WORKERS,
+        )[0]
+        result = scores if result is None else np.maximum(result, scores)
+    return result
+
+
+def _score_books(query: str, books: Sequence[BookRecord]) -> List[float]:
+    """
+    Пакетная версия _score_book: считает скор сразу для всех кандидатов.
+    """
+    return _score_strings(
+        query,
+        [book.title for book in books],
+        [book.author for book in books],
+    )
+
+
+def _score_strings(
+    query: str,
+    titles: Sequence[str],
+    authors: Sequence[str],
+) -> List[float]:
+    """
+    Считает скор _score_book для пар (titles[i], authors[i]) одним пакетом.
+
+    RapidFuzz-метрики считаются через process.cdist (в несколько потоков),
+    бонусы за фразу и слова — по заранее приведённым к нижнему регистру
+    массивам названий и авторов. Порядок арифметических операций совпадает
+    с _score_book, поэтому результат совпадает с ним бит в бит.
+    """
+    q = (query or "").strip()
+    if not q or not titles:
+        return [0.0] * len(titles)
+
+    count = len(titles)
+    q_lower = fold_yo(q.lower())
+    titles = [(title or "").strip() for title in titles]
+    authors = [(author or "").strip() for author in authors]
+    titles_lower = [fold_yo(title.lower()) for title in titles]
+    authors_lower = [fold_yo(author.lower()) for author in authors]
+
+    title_score = _max_ratio(q, titles)
+    author_score = _max_ratio(q, authors)
+
+    # Бонус за точное вхождение всей фразы в title
+    phrase_in_title = np.fromiter(
+        (q_lower in title for title in titles_lower), dtype=bool, count=count
+    )
+    title_score += np.where(phrase_in_title, 25.0, 0.0)
+
+    # Бонусы за совпадающие (ненулевые) слова из запроса
+    words_filtered = _normalize_words(q)
+    if words_filtered:
+        matched_title = np.zeros(count, dtype=np.float64)
+        matched_author = np.zeros(count, dtype=np.float64)
+        for w in words_filtered:
+            matched_title += np.fromiter(
+                (w in title for title in titles_lower), dtype=bool, count=count
+            )
+            matched_author += np.fromiter(
+                (w in author for author in authors_lower), dtype=bool, count=count
+            )
+
+        title_score += matched_title * 6.0
+        author_score += matched_author * 3.0
+        title_score += np.where(matched_title == len(words_filtered), 18.0, 0.0)
+
+    total = TITLE_WEIGHT * title_score + AUTHOR_WEIGHT * author_score
+    np.minimum(total, 100.0, out=total)
+
+    return total.tolist()
+
+
+def _rank_candidates(
+    query: str,
+    ids: Sequence[int],
+    titles: Sequence[str],
+    authors: Sequence[str],
+    min_score: float,
+) -> List[Tuple[int, float]]:
+    """
+    Стадия скоринга: возвращает пары (book_id, score) с score >= min_score,
+    отсортированные по убыванию score (при равенстве — в порядке кандидатов).
+
+    Принимает только id и строки, без ORM-объектов, поэтому может выполняться
+    как в потоке, так и в отдельном процессе (аргументы дёшево сериализуются).
+    """
+    results = [
+        (book_id, score)
+        for book_id, score in zip(ids, _score_strings(query, titles, authors))
+        if score >= min_score
+    ]
+    results.sort(key=lambda item: item[1], reverse=True)
+    return results
+
+
+def init_search_executor(
+    mode: Optional[str] = SEARCH_EXECUTOR,
+    workers: int = SEARCH_EXECUTOR_WORKERS,
+) -> None:
+    """
+    Создаёт пул для скоринга поисковых запросов:
+      - "process" — ProcessPoolExecutor, скоринг не держит GIL основного процесса;
+      - "thread"  — ThreadPoolExecutor, RapidFuzz отпускает GIL внутри cdist;
+      - None      — скоринг выполняется прямо в event loop.
+    Предыдущий пул, если был, останавливается.
+    """
+    global _executor
+    shutdown_search_executor()
+    if mode == "process":
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    elif mode == "thread":
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+    elif mode is not None:
+        raise ValueError(f"Неизвестный режим скоринга: {mode}")
+
+
+def shutdown_search_executor() -> None:
+    """
+    Останавливает пул скоринга (вызывается при остановке бота).
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+async def _rank(
+    query: str,
+    candidates: Sequence[BookRecord],
+    min_score: float,
+) -> List[Tuple[int, float]]:
+    """
+    Ранжирует кандидатов через _rank_candidates — в пуле, если он создан,
+    иначе прямо в event loop.
+    """
+    ids = [book.id for book in candidates]
+    titles = [book.title for book in candidates]
+    authors = [book.author for book in candidates]
+
+    if _executor is None:
+        return _rank_candidates(query, ids, titles, authors, min_score)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, _rank_candidates, query, ids, titles, authors, min_score
+    )
+
+
+def get_search_cache_stats() -> dict:
+    """
+    Счётчики кэша результатов поиска (size/hits/misses/hit_rate) для подбора его размера.
+    """
+    return _search_cache.stats()
+
+
+def _is_current(version: int) -> bool:
+    """
+    Можно ли кэшировать результат, посчитанный при поколении каталога
+    version: каталог с тех пор не менялся, а триграммный индекс (если он
+    используется) уже перестроен под это поколение.
+    """
+    if get_catalog_version() != version:
+        return False
+    if SEARCH_BACKEND != "trigram":
+        return True
+    index = get_search_index()
+    return index is not None and index.version == version
+
+
 async def search_books(
     query: str,
     limit: int = SEARCH_LIMIT,
     min_score: int = SEARCH_MIN_SCORE,
-) -> List[Book]:
+) -> List[BookRecord]:
     """
     Поиск книг с учётом опечаток (RapidFuzz), но улучшенный выбор кандидатов и скоринг.
+
+    Результаты кэшируются по нормализованному запросу (значимые слова, а если их
+    нет — вся фраза в нижнем регистре), limit и min_score. Кэш сбрасывается,
+    когда синхронизация меняет каталог.
     """
     q = (query or "").strip()
     if not q:
         return []
 
-    candidates = await _get_candidates_from_db(q)
+    version = get_catalog_version()
+    _search_cache.ensure_version(version)
+    cache_key = (_cache_query_key(q), limit, min_score)
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        return list(cached)
+
+    books = await _search_books_uncached(q, limit, min_score)
+    if _is_current(version):
+        _search_cache.set(cache_key, books)
+    return list(books)
+
+
+def _cache_query_key(q: str) -> Tuple[str, ...] | str:
+    """
+    Нормализованный запрос для ключей кэша: значимые слова,
+    а если их нет — вся фраза в нижнем регистре.
+    """
+    words = _normalize_words(q)
+    return tuple(words) if words else fold_yo(q.lower())
+
+
+async def _get_candidates(q: str) -> Tuple[List[BookRecord], Dict[int, BookRecord]]:
+    """
+    Кандидаты из индекса или из БД (в зависимости от SEARCH_BACKEND) и словарь
+    уже загруженных из БД книг (пустой, если кандидаты пришли из индекса).
+    """
+    candidates = await _get_candidates_from_index(q)
+    loaded: Dict[int, BookRecord] = {}
+    if candidates is None:
+        candidates = await _get_candidates_from_db(q)
+        loaded = {book.id: book for book in candidates}
+    return candidates, loaded
+
+
+async def _books_for_ids(book_ids: Sequence[int], loaded: Dict[int, BookRecord]) -> List[BookRecord]:
+    """
+    Книги по списку id в том же порядке: из уже загруженных, если они все есть,
+    иначе одним запросом к БД.
+    """
+    if all(book_id in loaded for book_id in book_ids):
+        return [loaded[book_id] for book_id in book_ids]
+    return await _load_books(book_ids)
+
+
+async def _rank_query(q: str, min_score: float) -> Tuple[List[int], Dict[int, BookRecord]]:
+    """
+    Полный цикл ранжирования без кэша: кандидаты + скоринг.
+
+    Возвращает id всех книг со score >= min_score по убыванию score и словарь
+    уже загруженных из БД книг (пустой, если кандидаты пришли из индекса).
+    """
+    candidates, loaded = await _get_candidates(q)
     if not candidates:
-        return []
+        return [], loaded
 
-    results: List[Tuple[Book, float]] = []
+    ranking = await _rank(q, candidates, min_score)
+    return [book_id for book_id, _ in ranking], loaded
 
-    for book in candidates:
-        score = _score_book(q, book)
-        if score >= min_score:
-            results.append((book, score))
 
-    # сортируем по убыванию score
-    results.sort(key=lambda item: item[1], reverse=True)
+async def _search_books_uncached(
+    q: str,
+    limit: int,
+    min_score: int,
+) -> List[BookRecord]:
+    """
+    Полный цикл поиска без кэша: ранжирование и загрузка top-N книг.
+    """
+    ranking, loaded = await _rank_query(q, min_score)
+    # Кандидаты из индекса: из БД читаем только итоговые top-N книг
+    return await _books_for_ids(ranking[:limit], loaded)
 
-    best_books: List[Book] = [item[0] for item in results[:limit]]
 
-    return best_books
\ No newline at end of file
+async def start_search_pages(
+    user_id: int,
+    query: str,
+    page_size: int = SEARCH_LIMIT,
+    min_score: int = SEARCH_MIN_SCORE,
+) -> Tuple[Optional[str], List[BookRecord], int]:
+    """
+    Выполняет поиск и запоминает полное ранжирование за пользователем, чтобы
+    следующие страницы нарезались из него без повторного скоринга.
+    Само ранжирование тоже берётся из общего кэша поиска, если оно там есть.
+
+    Возвращает (handle, книги первой страницы, total_pages). handle — короткий
+    идентификатор ранжирования для callback_data; None, если ничего не найдено.
+    """
+    global _ranking_counter
+    q = (query or "").strip()
+    if not q:
+        return None, [], 0
+
+    version = get_catalog_version()
+    _search_cache.ensure_version(version)
+    cache_key = ("ranking", _cache_query_key(q), min_score)
+    ranking = _search_cache.get(cache_key)
+    loaded: Dict[int, BookRecord] = {}
+    if ranking is None:
+        ranking, loaded = await _rank_query(q, min_score)
+        if _is_current(version):
+            _search_cache.set(cache_key, ranking)
+    if not ranking:
+        return None, [], 0
+
+    _ranking_counter += 1
+    handle = _to_base36(_ranking_counter)
+    _rankings.set((user_id, handle), (q, ranking))
+
+    total_pages = (len(ranking) + page_size - 1) // page_size
+    return handle, await _books_for_ids(ranking[:page_size], loaded), total_pages
+
+
+async def get_search_page(
+    user_id: int,
+    handle: str,
+    page: int,
+    page_size: int = SEARCH_LIMIT,
+) -> Optional[Tuple[str, List[BookRecord], int, int]]:
+    """
+    Возвращает страницу ранее сохранённого ранжирования:
+    (исходный запрос, книги страницы, номер страницы, total_pages).
+
+    Номер страницы "подрезается" до допустимого диапазона. Возвращает None,
+    если ранжирование устарело или принадлежит другому пользователю.
+    """
+    saved = _rankings.get((user_id, handle))
+    if saved is None:
+        return None
+
+    query, ranking = saved
+    total_pages = (len(ranking) + page_size - 1) // page_size
+    page = max(1, min(page, total_pages))
+    offset = (page - 1) * page_size
+    books = await _load_books(ranking[offset:offset + page_size])
+    return query, books, page, total_pages
+
+
+def _can_reuse_candidates(prev_query: str, prev_words: List[str], q: str, words: List[str]) -> bool:
+    """
+    Можно ли переиспользовать кандидатов предыдущего запроса пользователя.
+
+    Да, если новый запрос продолжает предыдущий, и каждое его значимое слово
+    содержит одно из значимых слов предыдущего: тогда книги, подходящие под новый
+    запрос (LIKE '%слово%'), — подмножество уже найденных. Для LIKE это точное
+    условие, для pg_trgm — близкое приближение.
+    """
+    if not prev_words or not fold_yo(q.lower()).startswith(prev_query):
+        return False
+    return all(any(prev in word for prev in prev_words) for word in words)
+
+
+async def search_books_as_you_type(
+    user_id: int,
+    query: str,
+    limit: int = SEARCH_LIMIT,
+    min_score: int = SEARCH_MIN_SCORE,
+) -> List[BookRecord]:
+    """
+    Поиск для режима "по мере набора" (inline-запросы приходят на каждое нажатие).
+
+    Помнит кандидатов последнего запроса пользователя: если новый запрос лишь
+    дописывает предыдущий ("war a" -> "war an"), кандидаты не выбираются заново,
+    а только переранжируются под новый текст.
+
+    Для триграммного индекса кандидаты не запоминаются: если есть книги со
+    всеми основами слов запроса, индекс возвращает только их, и кандидаты
+    "war" (книги с основой "war") не содержат книг, подходящих под "warhammer".
+    Индекс в памяти, так что кандидаты из него и так дешёвые.
+    """
+    q = (query or "").strip()
+    if not q:
+        return []
+
+    if SEARCH_BACKEND == "trigram":
+        candidates, loaded = await _get_candidates(q)
+    else:
+        _prefix_candidates.ensure_version(get_catalog_version())
+        words = _normalize_words(q)
+        prev = _prefix_candidates.get(user_id)
+        # Кандидатов, обрезанных по CANDIDATES_LIMIT, переиспользовать нельзя:
+        # часть подходящих книг могла в них не попасть
+        if (
+            prev is not None
+            and len(prev[2]) < CANDIDATES_LIMIT
+            and _can_reuse_candidates(prev[0], prev[1], q, words)
+        ):
+            candidates, loaded = prev[2], prev[3]
+        else:
+            candidates, loaded = await _get_candidates(q)
+        _prefix_candidates.set(user_id, (fold_yo(q.lower()), words, candidates, loaded))
+
+    if not candidates:
+        return []
+    ranking = await _rank(q, candidates, min_score)
+    return await _books_for_ids([book_id for book_id, _ in ranking[:limit]], loaded)
+
+
+def _to_base36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        value, rem = divmod(value, 36)
+        result = digits[rem] + result
+        if value == 0:
+            return result
@@ -0,0 +1,184 @@
+import asyncio
+import re
+from array import array
+from collections import Counter
+from heapq import nlargest
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+
+from app.config.search import SEARCH_INDEX_MIN_SIMILARITY
+from app.models.db import async_session_factory
+from app.models.records import BOOK_RECORD_COLUMNS, BookRecord
+from app.services.catalog_version import get_catalog_version
+from app.services.normalize import fold_yo, stem_words
+
+
+def _trigrams(words: List[str]) -> Set[str]:
+    """
+    Разбивает слова на триграммы в стиле pg_trgm: каждое слово дополняется
+    двумя пробелами в начале и одним в конце, поэтому даже короткие слова
+    дают хотя бы одну триграмму.
+    """
+    grams: Set[str] = set()
+    for word in words:
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", fold_yo((text or "").lower()), flags=re.UNICODE)
+
+
+class TrigramIndex:
+    """
+    Инвертированный триграммный индекс по названию и автору книг.
+
+    Для каждой триграммы хранится список позиций книг (array, чтобы не держать
+    сотни тысяч отдельных int-объектов). Поиск считает, сколько триграмм запроса
+    встречается у книги, и возвращает книги с наибольшим пересечением.
+
+    Кроме того, при построении для каждой книги один раз считаются основы слов
+    (book_stems: "ё" -> "е" и стемминг Snowball) и обратный индекс по ним.
+    Если у каких-то книг есть все основы запроса, кандидатами становятся только
+    они — нечёткий скоринг потом работает по заметно меньшему набору.
+    """
+
+    def __init__(self, books: List[BookRecord], version: int = 0):
+        self.books = books
+        # Поколение каталога, по которому построен индекс
+        self.version = version
+        # Основы слов названия и автора, в том же порядке, что и books
+        self.book_stems: List[frozenset[str]] = []
+
+        postings: Dict[str, List[int]] = {}
+        stem_postings: Dict[str, List[int]] = {}
+        for pos, book in enumerate(books):
+            words = _words(f"{book.title} {book.author}")
+            for gram in _trigrams(words):
+                postings.setdefault(gram, []).append(pos)
+            stems = frozenset(stem_words(words))
+            self.book_stems.append(stems)
+            for stem in stems:
+                stem_postings.setdefault(stem, []).append(pos)
+
+        self._postings: Dict[str, array] = {
+            gram: array("I", positions) for gram, positions in postings.items()
+        }
+        self._stem_postings: Dict[str, array] = {
+            stem: array("I", positions) for stem, positions in stem_postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def _exact_hits(self, words: List[str]) -> Set[int]:
+        """
+        Позиции книг, у которых есть все основы слов запроса.
+        """
+        hits: Optional[Set[int]] = None
+        for stem in set(stem_words(words)):
+            positions = self._stem_postings.get(stem)
+            if positions is None:
+                return set()
+            hits = set(positions) if hits is None else hits.intersection(positions)
+            if not hits:
+                return set()
+        return hits or set()
+
+    def candidates(self, words: List[str], limit: int) -> List[BookRecord]:
+        """
+        Возвращает до limit книг, отсортированных по числу общих с запросом
+        триграмм. Слова должны быть уже нормализованы (нижний регистр, "ё" -> "е").
+
+        Если есть книги со всеми основами слов запроса, возвращаются только они.
+        Иначе (например, в запросе опечатка) — книги, у которых совпало не меньше
+        SEARCH_INDEX_MIN_SIMILARITY триграмм запроса.
+        """
+        grams = _trigrams(words)
+        if not grams:
+            return []
+
+        counts: Counter = Counter()
+        for gram in grams:
+            positions = self._postings.get(gram)
+            if positions is not None:
+                counts.update(positions)
+
+        exact = self._exact_hits(words)
+        if exact:
+            best_exact = nlargest(limit, exact, key=lambda pos: counts.get(pos, 0))
+            return [self.books[pos] for pos in best_exact]
+
+        min_shared = max(1, int(len(grams) * SEARCH_INDEX_MIN_SIMILARITY))
+        best = nlargest(
+            limit,
+            (item for item in counts.items() if item[1] >= min_shared),
+            key=lambda item: item[1],
+        )
+        return [self.books[pos] for pos, _ in best]
+
+
+_index: Optional[TrigramIndex] = None
+_build_lock = asyncio.Lock()
+_rebuild_task: Optional[asyncio.Task] = None
+
+
+def get_search_index() -> Optional[TrigramIndex]:
+    """
+    Возвращает построенный индекс или None, если build_search_index ещё не вызывался.
+    """
+    return _index
+
+
+async def build_search_index() -> TrigramIndex:
+    """
+    Загружает id/title/author всех книг одним запросом (без ORM-объектов)
+    и строит по ним триграммный индекс. Вызывается при старте бота.
+
+    Сам индекс (триграммы и стемминг каждой книги) строится в отдельном
+    потоке, чтобы не останавливать цикл событий на больших каталогах.
+    """
+    global _index
+    version = get_catalog_version()
+    async with async_session_factory() as session:
+        result = await session.execute(select(*BOOK_RECORD_COLUMNS))
+        books = [
+            BookRecord(id=row.id, title=row.title or "", author=row.author or "")
+            for row in result
+        ]
+    index = await asyncio.to_thread(TrigramIndex, books, version)
+    # Пока строили, другая перестройка могла успеть поставить индекс новее
+    if _index is None or _index.version <= version:
+        _index = index
+    return index
+
+
+async def _rebuild_in_background() -> None:
+    try:
+        await build_search_index()
+    except Exception as e:
+        print(f"Ошибка при перестройке поискового индекса: {e}")
+
+
+async def ensure_search_index() -> TrigramIndex:
+    """
+    Возвращает индекс для поиска.
+
+    Если индекса ещё нет, он строится (одновременно — не больше одной
+    постройки). Если каталог изменился, индекс перестраивается в фоне,
+    а до готовности нового поиск идёт по прежнему индексу: удалённые книги
+    отсеиваются при загрузке из БД, новые появятся после перестройки.
+    """
+    global _rebuild_task
+    if _index is None:
+        async with _build_lock:
+            if _index is None:
+                return await build_search_index()
+        return _index
+
+    if _index.version != get_catalog_version() and (_rebuild_task is None or _rebuild_task.done()):
+        _rebuild_task = asyncio.create_task(_rebuild_in_background())
+    return _index
@@ -0,0 +1,327 @@
+import asyncio
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import delete, func, insert, select, update
+
+from app.config.similar import (
+    SIMILAR_AUTHOR_WEIGHT,
+    SIMILAR_CHUNK_SIZE,
+    SIMILAR_GENRE_BONUS,
+    SIMILAR_LIMIT,
+    SIMILAR_MIN_SCORE,
+    SIMILAR_TITLE_WEIGHT,
+    SIMILAR_WORKERS,
+)
+from app.models.book import Book
+from app.models.db import async_session_factory
+from app.models.records import BOOK_RECORD_COLUMNS, BookRecord
+from app.models.similar_book import SimilarBook, SimilarBookState
+from app.services.normalize import fold_yo
+
+# Список соседей книги: [(similar_id, score)] по убыванию score
+Neighbours = List[Tuple[int, float]]
+
+_refresh_task: Optional[asyncio.Task] = None
+_refresh_again = False
+
+
+def _normalize(text: str) -> str:
+    """
+    Строка для сравнения: нижний регистр, "ё" -> "е", только слова через пробел.
+    """
+    return " ".join(re.findall(r"\w+", fold_yo((text or "").lower())))
+
+
+def _top_neighbours(ids: np.ndarray, scores: np.ndarray) -> Neighbours:
+    """
+    SIMILAR_LIMIT лучших соседей по строке скоров (score >= SIMILAR_MIN_SCORE),
+    при равенстве скора — по возрастанию id.
+    """
+    k = min(SIMILAR_LIMIT, len(scores))
+    if k <= 0:
+        return []
+    # Все книги со скором не ниже k-го: среди равных скоров выбираем по id
+    kth = max(np.partition(scores, len(scores) - k)[len(scores) - k], SIMILAR_MIN_SCORE)
+    top = np.flatnonzero(scores >= kth)
+    neighbours = [(int(ids[i]), float(scores[i])) for i in top]
+    neighbours.sort(key=lambda item: (-item[1], item[0]))
+    return neighbours[:k]
+
+
+def _unique(strings: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Уникальные строки и индекс уникальной строки для каждой исходной.
+    """
+    positions: Dict[str, int] = {}
+    inverse = np.fromiter(
+        (positions.setdefault(s, len(positions)) for s in strings),
+        dtype=np.int64,
+        count=len(strings),
+    )
+    return list(positions), inverse
+
+
+def _pair_scores(unique: List[str], inverse: np.ndarray, rows: List[int]) -> np.ndarray:
+    """
+    Матрица token_set_ratio между строками rows и всеми строками.
+
+    У одного автора обычно много книг, да и названия повторяются, поэтому
+    process.cdist считается только по уникальным строкам, а результат
+    разворачивается обратно индексами.
+    """
+    row_unique, row_inverse = np.unique(inverse[rows], return_inverse=True)
+    scores = process.cdist(
+        [unique[i] for i in row_unique],
+        unique,
+        scorer=fuzz.token_set_ratio,
+        dtype=np.float32,
+        workers=SIMILAR_WORKERS,
+    )
+    return scores[row_inverse][:, inverse]
+
+
+def _compute_neighbours(
+    ids: Sequence[int],
+    titles: Sequence[str],
+    authors: Sequence[str],
+    genre_ids: Sequence[int],
+    changed: Sequence[int],
+    new: Sequence[int],
+    thresholds: np.ndarray,
+) -> Tuple[Dict[int, Neighbours], Dict[int, Neighbours]]:
+    """
+    Считает соседей книг с индексами changed среди всех книг.
+
+    Скоры считаются через process.cdist пачками по SIMILAR_CHUNK_SIZE строк,
+    так что в памяти не бывает всей матрицы N x N. Метрика симметрична,
+    поэтому строка новой книги (индексы new ⊆ changed) заодно даёт её скор
+    для всех остальных книг: если он выше порога thresholds[j] (худшего
+    скора в текущем списке j-й книги), новая книга предлагается в список j.
+
+    Возвращает (полные списки для changed, кандидатов для неизменённых книг).
+    Работает только с id и строками, поэтому выполняется в отдельном потоке.
+    """
+    ids_array = np.asarray(ids)
+    genres = np.asarray(genre_ids)
+    unique_titles, title_inverse = _unique([_normalize(title) for title in titles])
+    unique_authors, author_inverse = _unique([_normalize(author) for author in authors])
+    changed_mask = np.zeros(len(ids), dtype=bool)
+    changed_mask[list(changed)] = True
+    new_set = set(new)
+
+    lists: Dict[int, Neighbours] = {}
+    candidates: Dict[int, Neighbours] = {}
+    for start in range(0, len(changed), SIMILAR_CHUNK_SIZE):
+        rows = list(changed[start:start + SIMILAR_CHUNK_SIZE])
+        title_scores = _pair_scores(unique_titles, title_inverse, rows)
+        author_scores = _pair_scores(unique_authors, author_inverse, rows)
+        scores = title_scores * SIMILAR_TITLE_WEIGHT + author_scores * SIMILAR_AUTHOR_WEIGHT
+        scores += (genres[rows][:, None] == genres[None, :]) * SIMILAR_GENRE_BONUS
+        # Книга не может быть похожа сама на себя
+        scores[np.arange(len(rows)), rows] = -1
+
+        for row, i in enumerate(rows):
+            lists[int(ids_array[i])] = _top_neighbours(ids_array, scores[row])
+            if i not in new_set:
+                continue
+            offered = np.flatnonzero(
+                ~changed_mask
+                & (scores[row] >= SIMILAR_MIN_SCORE)
+                & (scores[row] > thresholds)
+            )
+            for j in offered:
+                candidates.setdefault(int(ids_array[j]), []).append(
+                    (int(ids_array[i]), float(scores[row, j]))
+                )
+
+    return lists, candidates
+
+
+async def _replace_lists(session, lists: Dict[int, Neighbours], lengths: Dict[int, int]) -> None:
+    """
+    Перезаписывает списки соседей книг и их отметки в similar_book_states
+    (с длиной посчитанного списка из lengths) пачками по SIMILAR_CHUNK_SIZE книг.
+    """
+    book_ids = list(lists)
+    for start in range(0, len(book_ids), SIMILAR_CHUNK_SIZE):
+        chunk = book_ids[start:start + SIMILAR_CHUNK_SIZE]
+        await session.execute(delete(SimilarBook).where(SimilarBook.book_id.in_(chunk)))
+        await session.execute(delete(SimilarBookState).where(SimilarBookState.book_id.in_(chunk)))
+        rows = [
+            {"book_id": book_id, "rank": rank, "similar_id": similar_id, "score": score}
+            for book_id in chunk
+            for rank, (similar_id, score) in enumerate(lists[book_id], start=1)
+        ]
+        if rows:
+            await session.execute(insert(SimilarBook), rows)
+        await session.execute(
+            insert(SimilarBookState),
+            [{"book_id": book_id, "neighbours": lengths[book_id]} for book_id in chunk],
+        )
+
+
+async def refresh_similar_books() -> int:
+    """
+    Обновляет списки «Похожие книги». Возвращает число пересчитанных книг.
+
+    Полностью пересчитываются только изменившиеся книги: новые (ещё нет
+    отметки в similar_book_states) и те, у которых удалили кого-то из
+    соседей. Списки остальных книг лишь дополняются новыми книгами, если
+    те похожи на них сильнее текущих соседей.
+
+    Чтение и запись идут в отдельных коротких транзакциях, а сам расчёт —
+    в потоке без открытой транзакции, чтобы не держать блокировку БД
+    (на SQLite — блокировку записи) на время cdist.
+    """
+    async with async_session_factory() as session:
+        books = (await session.execute(
+            select(Book.id, Book.title, Book.author, Book.genre_id).order_by(Book.id)
+        )).all()
+        states = dict((await session.execute(
+            select(SimilarBookState.book_id, SimilarBookState.neighbours)
+        )).all())
+        # Книги, у которых в списке есть удалённый сосед (если СУБД не удалила
+        # такие строки каскадом)
+        stale = set((await session.scalars(
+            select(SimilarBook.book_id).distinct().
+            outerjoin(Book, Book.id == SimilarBook.similar_id).
+            where(Book.id.is_(None))
+        )).all())
+        # Худший скор и длина текущего списка каждой книги
+        worst = {
+            book_id: (min_score, count)
+            for book_id, min_score, count in await session.execute(
+                select(SimilarBook.book_id, func.min(SimilarBook.score), func.count()).
+                group_by(SimilarBook.book_id)
+            )
+        }
+        # Книги, список которых стал короче посчитанного: сосед удалён каскадом
+        stale.update(
+            book_id
+            for book_id, neighbours in states.items()
+            if neighbours is not None and worst.get(book_id, (None, 0))[1] < neighbours
+        )
+
+        # Отметки, сделанные до появления колонки neighbours: запоминаем
+        # текущую длину списка, чтобы замечать её уменьшение в дальнейшем
+        await session.execute(
+            update(SimilarBookState).
+            where(SimilarBookState.neighbours.is_(None)).
+            values(neighbours=select(func.count()).
+                   where(SimilarBook.book_id == SimilarBookState.book_id).
+                   scalar_subquery())
+        )
+
+        # Удаляем следы удалённых книг
+        existing = select(Book.id)
+        await session.execute(delete(SimilarBookState).where(SimilarBookState.book_id.not_in(existing)))
+        await session.execute(delete(SimilarBook).where(SimilarBook.book_id.not_in(existing)))
+        await session.execute(delete(SimilarBook).where(SimilarBook.similar_id.not_in(existing)))
+        await session.commit()
+
+    ids = [book.id for book in books]
+    new = [i for i, book_id in enumerate(ids) if book_id not in states]
+    changed = sorted(set(new) | {i for i, book_id in enumerate(ids) if book_id in stale})
+    if not changed:
+        return 0
+
+    # Порог для предложения новой книги в существующий список: худший
+    # скор полного списка; в неполный список подходит любой скор выше минимума
+    thresholds = np.full(len(ids), -np.inf, dtype=np.float32)
+    for i, book_id in enumerate(ids):
+        min_score, count = worst.get(book_id, (None, 0))
+        if count >= SIMILAR_LIMIT:
+            thresholds[i] = min_score
+
+    lists, candidates = await asyncio.to_thread(
+        _compute_neighbours,
+        ids,
+        [book.title for book in books],
+        [book.author for book in books],
+        [book.genre_id for book in books],
+        changed,
+        new,
+        thresholds,
+    )
+
+    async with async_session_factory() as session:
+        # Пока шёл расчёт, книги могли удалить
+        alive = set()
+        for start in range(0, len(ids), SIMILAR_CHUNK_SIZE):
+            alive.update((await session.scalars(
+                select(Book.id).where(Book.id.in_(ids[start:start + SIMILAR_CHUNK_SIZE]))
+            )).all())
+
+        # Вливаем кандидатов в списки неизменённых книг
+        merged: Dict[int, Neighbours] = {}
+        candidates = {book_id: offered for book_id, offered in candidates.items() if book_id in alive}
+        if candidates:
+            current: Dict[int, Neighbours] = {book_id: [] for book_id in candidates}
+            result = await session.execute(
+                select(SimilarBook.book_id, SimilarBook.similar_id, SimilarBook.score).
+                where(SimilarBook.book_id.in_(candidates.keys())).
+                order_by(SimilarBook.book_id, SimilarBook.rank)
+            )
+            for book_id, similar_id, score in result:
+                current[book_id].append((similar_id, score))
+            for book_id, offered in candidates.items():
+                neighbours = current[book_id] + offered
+                neighbours.sort(key=lambda item: (-item[1], item[0]))
+                merged[book_id] = neighbours[:SIMILAR_LIMIT]
+
+        updated = {
+            book_id: neighbours
+            for book_id, neighbours in {**lists, **merged}.items()
+            if book_id in alive
+        }
+        # Длина — как посчитано: если удалённый за время расчёта сосед
+        # выпадет из списка, при следующем обновлении список пересчитается
+        lengths = {book_id: len(neighbours) for book_id, neighbours in updated.items()}
+        await _replace_lists(session, {
+            book_id: [item for item in neighbours if item[0] in alive]
+            for book_id, neighbours in updated.items()
+        }, lengths)
+        await session.commit()
+    return len(changed)
+
+
+async def _refresh_in_background() -> None:
+    global _refresh_again
+    while True:
+        _refresh_again = False
+        try:
+            await refresh_similar_books()
+        except Exception as e:
+            print(f"Ошибка при обновлении похожих книг: {e}")
+        if not _refresh_again:
+            break
+
+
+def schedule_similar_refresh() -> None:
+    """
+    Запускает обновление «Похожих книг» в фоне (после синхронизации или
+    импорта). Если обновление уже идёт, после него будет выполнено ещё одно.
+    """
+    global _refresh_task, _refresh_again
+    if _refresh_task is not None and not _refresh_task.done():
+        _refresh_again = True
+        return
+    _refresh_task = asyncio.create_task(_refresh_in_background())
+
+
+async def get_similar_books(book_id: int) -> List[BookRecord]:
+    """
+    Похожие книги в порядке убывания похожести — одним запросом
+    по первичному ключу (book_id, rank) таблицы similar_books.
+    """
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(*BOOK_RECORD_COLUMNS).
+            join(SimilarBook, SimilarBook.similar_id == Book.id).
+            where(SimilarBook.book_id == book_id).
+            order_by(SimilarBook.rank)
+        )
+        return [BookRecord(*row) for row in result]
@@ -0,0 +1,181 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.config.stats import (
+    POPULAR_DOWNLOAD_WEIGHT,
+    POPULAR_LIMIT,
+    POPULAR_QUESTION_WEIGHT,
+    POPULAR_VIEW_WEIGHT,
+    STATS_FLUSH_BATCH_SIZE,
+    STATS_FLUSH_INTERVAL,
+)
+from app.models.book import Book
+from app.models.book_stats import BookStats
+from app.models.db import async_session_factory, insert_on_conflict
+from app.models.records import BOOK_RECORD_COLUMNS, BookRecord
+from app.services.catalog_version import get_catalog_version
+
+# Ещё не записанные в БД приращения: book_id -> {"views": n, "downloads": n, "questions": n}
+_pending: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+_flush_task: Optional[asyncio.Task] = None
+_flush_lock = asyncio.Lock()
+
+# Готовый список «Популярное» и поколение каталога, для которого он посчитан
+_popular: Optional[List[BookRecord]] = None
+_popular_version: Optional[int] = None
+
+
+def record_view(book_id: int) -> None:
+    """
+    Учитывает открытие клавиатуры форматов книги (без обращения к БД).
+    """
+    _pending[book_id]["views"] += 1
+
+
+def record_download(book_id: int) -> None:
+    """
+    Учитывает отправку файла книги (без обращения к БД).
+    """
+    _pending[book_id]["downloads"] += 1
+
+
+def record_question(book_id: int) -> None:
+    """
+    Учитывает вопрос по книге нейросети (без обращения к БД).
+    """
+    _pending[book_id]["questions"] += 1
+
+
+def _upsert_statement(rows: List[dict]):
+    """
+    INSERT пачки строк счётчиков с прибавлением к уже сохранённым значениям
+    при конфликте по book_id.
+    """
+    return insert_on_conflict(
+        BookStats.__table__,
+        rows,
+        index_elements=["book_id"],
+        add_columns=("views", "downloads", "questions"),
+    )
+
+
+async def flush_stats() -> int:
+    """
+    Записывает накопленные счётчики в book_stats пачками по
+    STATS_FLUSH_BATCH_SIZE книг в одной транзакции и пересчитывает
+    «Популярное». Возвращает число книг, счётчики которых записаны.
+
+    Если запись не удалась, приращения возвращаются в память и будут
+    записаны при следующем сбросе.
+    """
+    global _pending
+
+    async with _flush_lock:
+        if not _pending:
+            return 0
+
+        pending, _pending = _pending, defaultdict(lambda: defaultdict(int))
+        rows = [
+            {
+                "book_id": book_id,
+                "views": counters["views"],
+                "downloads": counters["downloads"],
+                "questions": counters["questions"],
+            }
+            for book_id, counters in pending.items()
+        ]
+
+        try:
+            async with async_session_factory() as session:
+                # Книги могли удалить, пока счётчики копились в памяти
+                existing = set((await session.scalars(
+                    select(Book.id).where(Book.id.in_(pending.keys()))
+                )).all())
+                rows = [row for row in rows if row["book_id"] in existing]
+
+                for start in range(0, len(rows), STATS_FLUSH_BATCH_SIZE):
+                    await session.execute(
+                        _upsert_statement(rows[start:start + STATS_FLUSH_BATCH_SIZE])
+                    )
+                await session.commit()
+        except BaseException:
+            for book_id, counters in pending.items():
+                for name, value in counters.items():
+                    _pending[book_id][name] += value
+            raise
+
+        await _refresh_popular()
+        return len(rows)
+
+
+async def _refresh_popular() -> None:
+    """
+    Пересчитывает список «Популярное»: POPULAR_LIMIT книг с наибольшим
+    взвешенным числом просмотров, скачиваний и вопросов.
+    """
+    global _popular, _popular_version
+
+    version = get_catalog_version()
+    score = (
+        BookStats.views * POPULAR_VIEW_WEIGHT
+        + BookStats.downloads * POPULAR_DOWNLOAD_WEIGHT
+        + BookStats.questions * POPULAR_QUESTION_WEIGHT
+    )
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(*BOOK_RECORD_COLUMNS).
+            join(BookStats, BookStats.book_id == Book.id).
+            order_by(score.desc(), Book.id).
+            limit(POPULAR_LIMIT)
+        )
+        _popular = [BookRecord(*row) for row in result]
+    _popular_version = version
+
+
+async def get_popular_books() -> List[BookRecord]:
+    """
+    Список «Популярное». Отдаётся готовым: пересчитывается при сбросе
+    счётчиков и после изменения каталога (книги могли удалить).
+    """
+    if _popular is None or _popular_version != get_catalog_version():
+        await _refresh_popular()
+    return _popular
+
+
+async def _flush_periodically() -> None:
+    while True:
+        await asyncio.sleep(STATS_FLUSH_INTERVAL)
+        try:
+            await flush_stats()
+        except Exception as e:
+            print(f"Ошибка при записи статистики: {e}")
+
+
+def start_stats_flusher() -> None:
+    """
+    Запускает фоновую задачу, которая раз в STATS_FLUSH_INTERVAL секунд
+    сбрасывает счётчики в БД.
+    """
+    global _flush_task
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_periodically())
+
+
+async def stop_stats_flusher() -> None:
+    """
+    Останавливает фоновую задачу и записывает оставшиеся счётчики
+    (вызывается при остановке бота).
+    """
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    await flush_stats()
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+from ..config.upload import (
+    UPLOAD_CONCURRENCY,
+    UPLOAD_POSITION_UPDATE_INTERVAL,
+    UPLOAD_WAIT_SAMPLES,
+)
+
+
+@dataclass(eq=False)
+class _Ticket:
+    """
+    Заявка пользователя на загрузку файла.
+    """
+    user_id: int
+    enqueued_at: float
+    position: int = 0  # примерная позиция в очереди (1 — следующий)
+    granted: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+# Ожидающие заявки по пользователям; порядок ключей — очередь обхода round-robin
+_queues: "OrderedDict[int, Deque[_Ticket]]" = OrderedDict()
+# Пользователи, у которых сейчас идёт загрузка (не больше одной на пользователя)
+_active_users: set[int] = set()
+
+_uploads = 0
+_wait_max = 0.0
+_waits: Deque[float] = deque(maxlen=UPLOAD_WAIT_SAMPLES)
+
+
+def _update_positions() -> None:
+    """
+    Пересчитывает позиции ожидающих заявок в порядке round-robin:
+    сначала первые заявки всех пользователей, затем вторые и т.д.
+    """
+    queues = list(_queues.values())
+    position = 1
+    for i in range(max(map(len, queues), default=0)):
+        for queue in queues:
+            if i < len(queue):
+                ticket = queue[i]
+                if ticket.position != position:
+                    ticket.position = position
+                    ticket.changed.set()
+                position += 1
+
+
+def _dispatch() -> None:
+    """
+    Выдаёт свободные слоты загрузки: по кругу между пользователями,
+    пропуская тех, у кого загрузка уже идёт.
+    """
+    global _uploads, _wait_max
+
+    while len(_active_users) < UPLOAD_CONCURRENCY:
+        user_id = next((uid for uid in _queues if uid not in _active_users), None)
+        if user_id is None:
+            break
+
+        queue = _queues[user_id]
+        ticket = queue.popleft()
+        if queue:
+            _queues.move_to_end(user_id)
+        else:
+            del _queues[user_id]
+
+        _active_users.add(user_id)
+        wait = time.monotonic() - ticket.enqueued_at
+        _uploads += 1
+        _wait_max = max(_wait_max, wait)
+        _waits.append(wait)
+
+        ticket.granted = True
+        ticket.position = 0
+        ticket.changed.set()
+
+    _update_positions()
+
+
+def _release(ticket: _Ticket) -> None:
+    _active_users.discard(ticket.user_id)
+    _dispatch()
+
+
+def _withdraw(ticket: _Ticket) -> None:
+    """
+    Убирает из очереди заявку, которую перестали ждать.
+    """
+    queue = _queues.get(ticket.user_id)
+    if queue is not None and ticket in queue:
+        queue.remove(ticket)
+        if not queue:
+            del _queues[ticket.user_id]
+    _update_positions()
+
+
+async def _wait_for_turn(
+    ticket: _Ticket,
+    on_position: Optional[Callable[[int], Awaitable[None]]],
+) -> None:
+    """
+    Ждёт, пока заявке выдадут слот, сообщая позицию в очереди через
+    on_position не чаще раза в UPLOAD_POSITION_UPDATE_INTERVAL секунд.
+    """
+    reported = None
+    reported_at = float("-inf")
+    while not ticket.granted:
+        now = time.monotonic()
+        if on_position is not None and ticket.position != reported:
+            if now - reported_at >= UPLOAD_POSITION_UPDATE_INTERVAL:
+                reported, reported_at = ticket.position, now
+                await on_position(ticket.position)
+                continue
+            timeout = UPLOAD_POSITION_UPDATE_INTERVAL - (now - reported_at)
+        else:
+            timeout = None
+
+        ticket.changed.clear()
+        try:
+            await asyncio.wait_for(ticket.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+@asynccontextmanager
+async def upload_slot(
+    user_id: int,
+    on_position: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> AsyncIterator[None]:
+    """
+    Слот для загрузки файла в Telegram.
+
+    Одновременно идёт не больше UPLOAD_CONCURRENCY загрузок и не больше
+    одной на пользователя; свободные слоты раздаются пользователям по кругу,
+    поэтому один пользователь с десятком скачиваний не задерживает остальных.
+    Пока заявка ждёт, on_position (если задан) получает её позицию в очереди.
+
+        async with upload_slot(user_id, on_position):
+            await message.answer_document(...)
+    """
+    ticket = _Ticket(user_id=user_id, enqueued_at=time.monotonic())
+    _queues.setdefault(user_id, deque()).append(ticket)
+    _dispatch()
+
+    try:
+        await _wait_for_turn(ticket, on_position)
+    except BaseException:
+        if ticket.granted:
+            _release(ticket)
+        else:
+            _withdraw(ticket)
+        raise
+
+    try:
+        yield
+    finally:
+        _release(ticket)
+
+
+def get_upload_queue_stats() -> Dict[str, float]:
+    """
+    Метрики очереди загрузок: глубина очереди, число идущих загрузок
+    и время ожидания слота (среднее, p50 и p95 по последним заявкам, максимум).
+    """
+    waits = sorted(_waits)
+    return {
+        "queued": sum(map(len, _queues.values())),
+        "in_flight": len(_active_users),
+        "max_concurrency": UPLOAD_CONCURRENCY,
+        "uploads": _uploads,
+        "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+        "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+        "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+        "wait_max": _wait_max,
+    }
@@ -8,20 +8,26 @@ CATALOG_CHOOSE_GENRE = "🔎 Выберите жанр из списка:"
 CATALOG_NO_GENRES = "📭 Пока жанров нет."
 CATALOG_NO_BOOKS = "📭 В этом жанре пока нет книг."
 CATALOG_CURRENT_GENRE = "📖 Книги в выбранном жанре:"
+CATALOG_POPULAR = "🔥 Популярные книги:"
+CATALOG_NO_POPULAR = "📭 Пока нет данных о популярных книгах."
 CATALOG_GENRE_CHOOSE_ERROR = "❗ Ошибка при выборе жанра. Пожалуйста, попробуйте ещё раз."
 
 SEARCH_PROMPT = "🔍 Введите название книги для поиска:"
 SEARCH_EMPTY_QUERY = "⚠️ Пустой запрос. Пожалуйста, введите название книги или автора."
 SEARCH_NO_RESULTS = "⚠️ По запросу «{query}» ничего не найдено."
 SEARCH_RESULT = "🔎 Результаты поиска по запросу:\n\n<i>{query}</i>"
+SEARCH_RESULTS_EXPIRED = "⌛ Результаты поиска устарели. Пожалуйста, повторите запрос."
 
 BOOK_SELECT_FORMAT = "📥 Выберите формат книги:"
 BOOK_DOWNLOAD_ERROR_DATA_NOT_FOUND = "⚠️ Ошибка в данных для загрузки файла."
 BOOK_DOWNLOAD_ERROR_FILE_NOT_FOUND = "📁 Файл не найден!"
 BOOK_SENDING_IN_PROGRESS = "<i>Файл готовится к отправке, подождите…</i>"
+BOOK_SENDING_QUEUED = "<i>Файл в очереди на отправку, перед вами: {ahead}. Подождите…</i>"
 BOOK_READY_CAPTION = "Готово! Книга доступна для загрузки:\n\n<b>{book_name}</b> 📖"
 BOOK_NAME = "{title} — {author}"
 BOOK_UNKNOWN_BOOK = "📕 Неизвестная книга"
+BOOK_SIMILAR = "🔗 Книги, похожие на <b>{book_name}</b>:"
+BOOK_NO_SIMILAR = "📭 Похожих книг пока не найдено."
 
 BUTTON_MENU_CATALOG = "📚 Каталог"
 BUTTON_MENU_SEARCH = "🔎 Поиск"
@@ -30,12 +36,16 @@ BUTTON_BACK_TO_MAIN_MENU = "🏠 В главное меню"
 KEYBOARD_PREV = "⬅️ Назад"
 KEYBOARD_NEXT = "Вперёд ➡️"
 KEYBOARD_BACK_TO_GENRE = "⬅️ К жанрам"
+KEYBOARD_POPULAR = "🔥 Популярное"
 KEYBOARD_BACK_TO_SEARCH = "⬅️ К поиску"
 KEYBOARD_PAGES = "{page}/{total_pages}"
 KEYBOARD_NO_GENRES = "📭 Нет доступных жанров."
 KEYBOARD_NO_FILES = "📁 Нет доступных файлов."
 KEYBOARD_AI_QA = "❓ Спросить у YandexGPT"
+KEYBOARD_SIMILAR = "🔗 Похожие книги"
+KEYBOARD_BACK_TO_BOOK = "⬅️ К книге"
 KEYBOARD_BOOK_NAME = "{title} — {author}"
+KEYBOARD_OPEN_BOOK = "📥 Открыть книгу"
 
 QA_ERROR_BAD_REQUEST = "⚠️ Ошибка при обработке вашего вопроса. Пожалуйста, попробуйте позже."
 QA_LIMIT_EXCEEDED = "⚠️ Превышен лимит запросов к нейросети. Попробуйте завтра."
@@ -43,4 +53,49 @@ QA_ENTER_QUESTION = "❓ Введите ваш вопрос по книге:"
 QA_ASKING_SENT = "📨 Ваш запрос отправлен.\nИспользовано {count} из {total} запросов."
 QA_QUESTION_TOO_LONG = "⚠️ Вопрос слишком длинный. Максимальная длина — 300 символов."
 QA_IN_PROGRESS = "<i>Запрос обрабатывается, подождите…</i>"
-QA_RESPONSE_READY = "🤖 Ответ по книге <b>{book_name}</b>:\n\n{answer}"
\ No newline at end of file
+QA_RESPONSE_READY = "🤖 Ответ по книге <b>{book_name}</b>:\n\n{answer}"
+IMPORT_USAGE = (
+    "📦 Пришлите zip/tar архив с подписью /import "
+    "или укажите путь к архиву на сервере: /import &lt;путь&gt;"
+)
+IMPORT_IN_PROGRESS = "<i>Импорт архива, подождите…</i>"
+IMPORT_FAILED = "⚠️ Ошибка импорта: {error}"
+IMPORT_REPORT = (
+    "✅ Импорт завершён.\n\n"
+    "Новых файлов: {files} ({megabytes:.1f} МБ)\n"
+    "Пропущено (уже есть): {skipped}\n"
+    "Неверные имена: {invalid}\n"
+    "Время: {seconds:.1f} с — {files_per_second:.1f} файлов/с, {mb_per_second:.1f} МБ/с"
+)
+
+PRUNE_USAGE = (
+    "🧹 /prune — показать, что будет удалено из каталога (файлы, которых нет на диске, "
+    "и опустевшие книги и жанры)\n"
+    "/prune apply — удалить\n"
+    "/prune force — удалить, даже если исчезла большая часть файлов"
+)
+PRUNE_IN_PROGRESS = "<i>Сверка каталога с хранилищем, подождите…</i>"
+PRUNE_FAILED = "⚠️ Ошибка очистки каталога: {error}"
+PRUNE_DRY_RUN = "🔍 Пробный запуск — ничего не удалено. Удалить: /prune apply"
+PRUNE_DONE = "🧹 Очистка каталога завершена."
+PRUNE_ABORTED = "⛔️ Удаление отменено."
+PRUNE_OVER_LIMIT = (
+    "⚠️ На диске нет больше {max_percent}% файлов каталога — /prune apply их не удалит. "
+    "Проверьте, что хранилище смонтировано; удалить всё равно: /prune force"
+)
+PRUNE_REPORT = (
+    "{title}\n\n"
+    "Файлов нет на диске: {files} из {total_files}\n"
+    "Книг без файлов: {books}\n"
+    "Жанров без книг: {genres}"
+)
+PRUNE_EXAMPLE = "• <code>{path}</code>"
+
+UPLOAD_QUEUE_STATS = (
+    "📤 Очередь отправки файлов\n\n"
+    "В очереди: {queued}\n"
+    "Отправляется: {in_flight} из {max_concurrency}\n"
+    "Всего отправок: {uploads}\n"
+    "Ожидание: среднее {wait_avg:.1f} с, p50 {wait_p50:.1f} с, "
+    "p95 {wait_p95:.1f} с, макс. {wait_max:.1f} с"
+)
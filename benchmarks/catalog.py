@@ -0,0 +1,110 @@
+"""
+Генерация синтетического каталога для бенчмарков поиска.
+
+Названия и имена собираются из слогов, поэтому выглядят как настоящие слова
+(кириллица и латиница вперемешку), а пары (название, автор) уникальны —
+это нужно, чтобы у каждого запроса была однозначная "правильная" книга.
+"""
+import random
+from dataclasses import dataclass
+
+from sqlalchemy import delete, insert
+
+from app.models.book import Book, BookFile, Genre
+from app.models.db import async_session_factory
+
+CYRILLIC_SYLLABLES = [
+    "ва", "ко", "ли", "ма", "но", "ра", "сто", "ти", "ше", "бро", "дей", "жи",
+    "зо", "ка", "ле", "мир", "на", "ос", "пе", "ро", "су", "тё", "ур", "фе",
+    "хо", "це", "чи", "ша", "ще", "ёл", "ю", "я", "гра", "ст", "вой", "ён",
+]
+LATIN_SYLLABLES = [
+    "ba", "ce", "di", "fo", "gu", "ha", "jo", "ka", "le", "mi", "no", "pa",
+    "qu", "ra", "se", "ti", "vo", "wa", "xe", "yo", "ze", "th", "sh", "or",
+]
+CYRILLIC_FIRST_NAMES = ["Лев", "Фёдор", "Анна", "Михаил", "Ольга", "Иван", "Мария", "Сергей"]
+LATIN_FIRST_NAMES = ["John", "Mary", "Arthur", "Agatha", "Stephen", "Jane", "Frank", "Ursula"]
+
+
+@dataclass
+class GeneratedBook:
+    id: int
+    title: str
+    author: str
+    genre_id: int
+
+
+def _word(rnd: random.Random, syllables: list[str]) -> str:
+    return "".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 4)))
+
+
+def generate_books(count: int, genres: int = 12, seed: int = 42) -> list[GeneratedBook]:
+    """
+    Генерирует count книг с уникальными парами (название, автор).
+    Примерно 70% книг — на кириллице, остальные — на латинице.
+    """
+    rnd = random.Random(seed)
+    authors_cyr = [
+        f"{rnd.choice(CYRILLIC_FIRST_NAMES)} {_word(rnd, CYRILLIC_SYLLABLES).capitalize()}"
+        for _ in range(max(10, count // 20))
+    ]
+    authors_lat = [
+        f"{rnd.choice(LATIN_FIRST_NAMES)} {_word(rnd, LATIN_SYLLABLES).capitalize()}"
+        for _ in range(max(10, count // 20))
+    ]
+
+    seen: set[tuple[str, str]] = set()
+    books: list[GeneratedBook] = []
+    while len(books) < count:
+        cyrillic = rnd.random() < 0.7
+        syllables = CYRILLIC_SYLLABLES if cyrillic else LATIN_SYLLABLES
+        title = " ".join(_word(rnd, syllables) for _ in range(rnd.randint(1, 4))).capitalize()
+        author = rnd.choice(authors_cyr if cyrillic else authors_lat)
+        if (title, author) in seen:
+            continue
+        seen.add((title, author))
+        books.append(
+            GeneratedBook(
+                id=len(books) + 1,
+                title=title,
+                author=author,
+                genre_id=rnd.randint(1, genres),
+            )
+        )
+    return books
+
+
+async def load_catalog(books: list[GeneratedBook], genres: int = 12, batch: int = 10_000) -> None:
+    """
+    Очищает таблицы каталога и заливает в них сгенерированные книги
+    пакетными INSERT'ами (по одному файлу fb2 на книгу).
+    """
+    async with async_session_factory() as session:
+        await session.execute(delete(BookFile))
+        await session.execute(delete(Book))
+        await session.execute(delete(Genre))
+        await session.execute(
+            insert(Genre),
+            [{"id": i, "name": f"genre-{i}"} for i in range(1, genres + 1)],
+        )
+        for start in range(0, len(books), batch):
+            chunk = books[start:start + batch]
+            await session.execute(
+                insert(Book),
+                [
+                    {"id": b.id, "title": b.title, "author": b.author, "genre_id": b.genre_id}
+                    for b in chunk
+                ],
+            )
+            await session.execute(
+                insert(BookFile),
+                [
+                    {
+                        "book_id": b.id,
+                        "format": "fb2",
+                        "path": f"genre-{b.genre_id}/{b.title} - {b.author}.fb2",
+                    }
+                    for b in chunk
+                ],
+            )
+            await session.commit()
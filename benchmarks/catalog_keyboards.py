@@ -0,0 +1,55 @@
+"""
+Микробенчмарк: CPU на построение клавиатуры каталога в одном колбэке.
+
+Сравнивает сборку InlineKeyboardMarkup с нуля (как до кэширования) и выдачу
+готовой клавиатуры из кэша для списка жанров и страницы книг жанра.
+БД не нужна: книги и жанры генерируются в памяти.
+
+Запуск из корня репозитория:
+    python -m benchmarks.catalog_keyboards [--iterations 20000]
+"""
+import argparse
+import os
+import timeit
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.keyboards import catalog as keyboards  # noqa: E402
+from app.models.records import BookRecord, GenreRecord  # noqa: E402
+from app.services.catalog_version import get_catalog_version  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Стоимость клавиатур каталога: сборка vs кэш")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    genres = [GenreRecord(id=i, name=f"Жанр {i}") for i in range(1, 13)]
+    books = [
+        BookRecord(id=i, title=f"Название книги номер {i}", author=f"Автор {i}")
+        for i in range(1, 11)
+    ]
+
+    version = get_catalog_version()
+    cases = {
+        "genres": (
+            lambda: keyboards._build_genres_keyboard(genres),
+            lambda: keyboards.genres_keyboard(genres, version),
+        ),
+        "books page": (
+            lambda: keyboards._build_books_catalog_keyboard(books, 3, 2, 40),
+            lambda: keyboards.books_catalog_keyboard(books, 3, 2, 40, version),
+        ),
+    }
+
+    print(f"{'keyboard':<11} {'build, µs':>10} {'cached, µs':>11} {'speedup':>8}")
+    for name, (build, cached) in cases.items():
+        cached()  # первый вызов кладёт клавиатуру в кэш
+        build_us = timeit.timeit(build, number=args.iterations) / args.iterations * 1e6
+        cached_us = timeit.timeit(cached, number=args.iterations) / args.iterations * 1e6
+        print(f"{name:<11} {build_us:>10.2f} {cached_us:>11.2f} {build_us / cached_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
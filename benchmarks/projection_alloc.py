@@ -0,0 +1,94 @@
+"""
+Бенчмарк памяти и аллокаций: ORM-объекты Book против лёгких записей BookRecord.
+
+Загружает одни и те же строки двумя способами — select(Book) с полноценными
+ORM-объектами (identity map, отслеживание состояния) и select(*BOOK_RECORD_COLUMNS)
+с BookRecord на __slots__ — и для каждого печатает время, пиковую память
+(tracemalloc) и число живых аллокаций на момент окончания выборки.
+
+Каталог генерируется в локальную БД (см. benchmarks/catalog.py).
+
+Запуск из корня репозитория:
+    python -m benchmarks.projection_alloc [--books 100000] [--batch 1000] [--rounds 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{Path(__file__).resolve().parent / 'bench.db'}",
+)
+
+from sqlalchemy import select  # noqa: E402
+
+from app.models import db  # noqa: E402
+from app.models.book import Book  # noqa: E402
+from app.models.records import BOOK_RECORD_COLUMNS, BookRecord  # noqa: E402
+from benchmarks.catalog import generate_books, load_catalog  # noqa: E402
+
+
+async def load_orm(limit: int) -> list:
+    async with db.async_session_factory() as session:
+        result = await session.execute(select(Book).limit(limit))
+        return list(result.scalars().all())
+
+
+async def load_records(limit: int) -> list:
+    async with db.async_session_factory() as session:
+        result = await session.execute(select(*BOOK_RECORD_COLUMNS).limit(limit))
+        return [BookRecord(*row) for row in result]
+
+
+async def measure(loader, limit: int, rounds: int) -> dict:
+    await loader(limit)  # прогрев: компиляция запроса, кэши SQLAlchemy
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await loader(limit)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    rows = await loader(limit)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = snapshot.statistics("filename")
+    return {
+        "rows": len(rows),
+        "median_ms": statistics.median(timings) * 1000,
+        "peak_kib": peak / 1024,
+        "live_blocks": sum(stat.count for stat in stats),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="ORM Book vs BookRecord: память и аллокации")
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000, help="строк за одну выборку")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    db.engine.echo = False
+    await db.init_db()
+    await load_catalog(generate_books(args.books))
+
+    print(f"{'path':<8} {'rows':>7} {'median, ms':>11} {'peak, KiB':>10} {'live blocks':>12}")
+    for name, loader in (("orm", load_orm), ("records", load_records)):
+        row = await measure(loader, args.batch, args.rounds)
+        print(
+            f"{name:<8} {row['rows']:>7} {row['median_ms']:>11.2f} "
+            f"{row['peak_kib']:>10.1f} {row['live_blocks']:>12}"
+        )
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
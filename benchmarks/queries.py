@@ -0,0 +1,81 @@
+"""
+Корпус поисковых запросов с известным правильным ответом.
+
+Для каждой выбранной книги строится запрос одного из видов:
+  - exact        — название как есть;
+  - typo         — название с 1–2 опечатками (замена/пропуск/вставка буквы);
+  - transposition — название с переставленными соседними буквами;
+  - partial      — только часть слов названия;
+  - author       — название + фамилия автора с опечаткой;
+  - author_only  — только фамилия автора (правильный ответ — любая его книга).
+"""
+import random
+from dataclasses import dataclass
+
+from benchmarks.catalog import GeneratedBook
+
+KINDS = ("exact", "typo", "transposition", "partial", "author", "author_only")
+LETTERS = "абвгдеёжзийклмнопрстуфхцчшщыэюяabcdefghijklmnopqrstuvwxyz"
+
+
+@dataclass
+class BenchQuery:
+    kind: str
+    text: str
+    # id книг, любая из которых считается правильным ответом
+    expected: frozenset[int]
+
+
+def _typo(rnd: random.Random, text: str) -> str:
+    positions = [i for i, ch in enumerate(text) if ch.isalpha()]
+    if not positions:
+        return text
+    i = rnd.choice(positions)
+    op = rnd.choice(("replace", "delete", "insert"))
+    if op == "replace":
+        return text[:i] + rnd.choice(LETTERS) + text[i + 1:]
+    if op == "delete":
+        return text[:i] + text[i + 1:]
+    return text[:i] + rnd.choice(LETTERS) + text[i:]
+
+
+def _transpose(rnd: random.Random, text: str) -> str:
+    pairs = [i for i in range(len(text) - 1) if text[i].isalpha() and text[i + 1].isalpha()]
+    if not pairs:
+        return text
+    i = rnd.choice(pairs)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def build_queries(books: list[GeneratedBook], count: int, seed: int = 7) -> list[BenchQuery]:
+    rnd = random.Random(seed)
+    by_author: dict[str, set[int]] = {}
+    for book in books:
+        by_author.setdefault(book.author, set()).add(book.id)
+
+    queries: list[BenchQuery] = []
+    for i in range(count):
+        book = rnd.choice(books)
+        kind = KINDS[i % len(KINDS)]
+        expected = frozenset({book.id})
+        surname = book.author.split()[-1]
+
+        if kind == "exact":
+            text = book.title
+        elif kind == "typo":
+            text = _typo(rnd, book.title)
+            if len(book.title) > 10:
+                text = _typo(rnd, text)
+        elif kind == "transposition":
+            text = _transpose(rnd, book.title)
+        elif kind == "partial":
+            words = book.title.split()
+            text = " ".join(words[:max(1, len(words) - 1)])
+        elif kind == "author":
+            text = f"{book.title} {_typo(rnd, surname)}"
+        else:
+            text = surname
+            expected = frozenset(by_author[book.author])
+
+        queries.append(BenchQuery(kind=kind, text=text, expected=expected))
+    return queries
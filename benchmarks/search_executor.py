@@ -0,0 +1,114 @@
+"""
+Бенчмарк: насколько поиск тормозит остальные обработчики бота.
+
+Запускает параллельно несколько "пользователей", которые непрерывно ищут
+по 1000 синтетическим кандидатам, и "прочие обработчики" — короткие корутины,
+которые каждые TICK секунд просыпаются в event loop. Задержка пробуждения
+корутины относительно расписания — это время, которое обычный апдейт
+(клик по каталогу, скачивание) ждал бы, пока поиск занимает event loop.
+
+Для каждого режима SEARCH_EXECUTOR печатает p50/p99/max этой задержки
+и пропускную способность поиска.
+
+Запуск из корня репозитория:
+    python -m benchmarks.search_executor [--seconds 5] [--searchers 4] [--workers 2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.services import search  # noqa: E402
+from app.models.records import BookRecord  # noqa: E402
+
+TICK = 0.005
+QUERIES = ["война и мир", "мастер маргарита", "толстой", "приключения шерлока", "dune herbert"]
+ALPHABET = "абвгдежзийклмнопрстуфхцчшщыэюяabcdefghijklmnopqrstuvwxyz"
+
+
+def _word(rnd: random.Random) -> str:
+    return "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(3, 10)))
+
+
+def make_candidates(count: int, seed: int = 42) -> list[BookRecord]:
+    rnd = random.Random(seed)
+    return [
+        BookRecord(
+            id=i,
+            title=" ".join(_word(rnd) for _ in range(rnd.randint(1, 5))).capitalize(),
+            author=f"{_word(rnd).capitalize()} {_word(rnd).capitalize()}",
+        )
+        for i in range(count)
+    ]
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def _searcher(candidates, deadline: float, done: list[int]) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        await search._rank(QUERIES[i % len(QUERIES)], candidates, 0)
+        done.append(1)
+        i += 1
+        # отдаём управление, как это делает реальный обработчик между await'ами
+        await asyncio.sleep(0)
+
+
+async def _probe(deadline: float, lags: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - expected)
+
+
+async def run_mode(mode, args, candidates) -> dict:
+    search.init_search_executor(mode, args.workers)
+    # прогрев пула (в режиме process — запуск процессов и импорт модулей)
+    await search._rank(QUERIES[0], candidates, 0)
+
+    deadline = time.perf_counter() + args.seconds
+    lags: list[float] = []
+    done: list[int] = []
+    await asyncio.gather(
+        _probe(deadline, lags),
+        *(_searcher(candidates, deadline, done) for _ in range(args.searchers)),
+    )
+    search.shutdown_search_executor()
+
+    return {
+        "mode": mode or "inline",
+        "p50_ms": statistics.median(lags) * 1000,
+        "p99_ms": percentile(lags, 0.99) * 1000,
+        "max_ms": max(lags) * 1000,
+        "searches_per_s": len(done) / args.seconds,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--searchers", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--candidates", type=int, default=1000)
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidates)
+    print(f"{'mode':<8} {'p50, ms':>9} {'p99, ms':>9} {'max, ms':>9} {'search/s':>9}")
+    for mode in (None, "thread", "process"):
+        row = await run_mode(mode, args, candidates)
+        print(
+            f"{row['mode']:<8} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+            f"{row['max_ms']:>9.2f} {row['searches_per_s']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
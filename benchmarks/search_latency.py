@@ -0,0 +1,162 @@
+"""
+Бенчмарк задержки и полноты поиска (search_books) на синтетическом каталоге.
+
+Для каждого размера каталога:
+  - генерирует каталог и заливает его в локальную БД (DATABASE_URL,
+    по умолчанию SQLite-файл benchmarks/bench.db — нужен aiosqlite);
+  - строит триграммный индекс, если выбран бэкенд "trigram";
+  - прогоняет корпус запросов с опечатками и перестановками (кэш результатов
+    сбрасывается перед каждым запросом, чтобы мерить полный путь);
+  - считает p50/p95/p99 задержки и recall@5 — в целом и по видам запросов.
+
+Результаты пишутся в JSON, чтобы сравнивать бэкенды и веса между прогонами.
+
+Запуск из корня репозитория:
+    python -m benchmarks.search_latency --sizes 10000 100000 --queries 600 \\
+        --backend trigram --out bench_search.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import time
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{Path(__file__).resolve().parent / 'bench.db'}",
+)
+
+from app.models import db  # noqa: E402
+from app.services import search  # noqa: E402
+from app.services.catalog_version import bump_catalog_version  # noqa: E402
+from app.services.search_index import build_search_index  # noqa: E402
+from benchmarks.catalog import generate_books, load_catalog  # noqa: E402
+from benchmarks.queries import KINDS, build_queries  # noqa: E402
+
+RECALL_AT = 5
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def _latency_stats(latencies: list[float]) -> dict:
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def run_size(size: int, args) -> dict:
+    books = generate_books(size, seed=args.seed)
+    started = time.perf_counter()
+    await load_catalog(books)
+    load_seconds = time.perf_counter() - started
+
+    # Каталог в БД заменён: сбрасываем все зависящие от него кэши
+    bump_catalog_version()
+    index_seconds = None
+    if search.SEARCH_BACKEND == "trigram":
+        started = time.perf_counter()
+        await build_search_index()
+        index_seconds = time.perf_counter() - started
+
+    queries = build_queries(books, args.queries, seed=args.seed)
+    latencies: list[float] = []
+    by_kind: dict[str, dict[str, list]] = {kind: {"lat": [], "hit": []} for kind in KINDS}
+
+    for query in queries:
+        search._search_cache.clear()
+        started = time.perf_counter()
+        found = await search.search_books(query.text, limit=RECALL_AT, min_score=args.min_score)
+        elapsed = time.perf_counter() - started
+
+        hit = any(book.id in query.expected for book in found)
+        latencies.append(elapsed)
+        by_kind[query.kind]["lat"].append(elapsed)
+        by_kind[query.kind]["hit"].append(hit)
+
+    hits = [hit for kind in by_kind.values() for hit in kind["hit"]]
+    return {
+        "catalog_size": size,
+        "queries": len(queries),
+        "load_seconds": load_seconds,
+        "index_build_seconds": index_seconds,
+        "latency": _latency_stats(latencies),
+        f"recall@{RECALL_AT}": sum(hits) / len(hits),
+        "by_kind": {
+            kind: {
+                "queries": len(data["hit"]),
+                "latency": _latency_stats(data["lat"]),
+                f"recall@{RECALL_AT}": sum(data["hit"]) / len(data["hit"]),
+            }
+            for kind, data in by_kind.items()
+            if data["hit"]
+        },
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк задержки и полноты search_books")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=600)
+    parser.add_argument("--backend", choices=["trigram", "postgres", "like"], default=None)
+    parser.add_argument("--title-weight", type=float, default=None)
+    parser.add_argument("--author-weight", type=float, default=None)
+    parser.add_argument("--min-score", type=int, default=search.SEARCH_MIN_SCORE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=Path("bench_search.json"))
+    args = parser.parse_args()
+
+    # Переопределения конфигурации применяются к уже импортированному модулю поиска
+    if args.backend is not None:
+        search.SEARCH_BACKEND = args.backend
+    if args.title_weight is not None:
+        search.TITLE_WEIGHT = args.title_weight
+    if args.author_weight is not None:
+        search.AUTHOR_WEIGHT = args.author_weight
+
+    db.engine.echo = False
+    await db.init_db()
+
+    report = {
+        "config": {
+            "backend": search.SEARCH_BACKEND,
+            "dialect": db.engine.dialect.name,
+            "title_weight": search.TITLE_WEIGHT,
+            "author_weight": search.AUTHOR_WEIGHT,
+            "min_score": args.min_score,
+            "candidates_limit": search.CANDIDATES_LIMIT,
+            "executor": search.SEARCH_EXECUTOR,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": [],
+    }
+
+    for size in args.sizes:
+        result = await run_size(size, args)
+        report["results"].append(result)
+        print(
+            f"{size:>9} books: p50 {result['latency']['p50_ms']:.1f} ms, "
+            f"p95 {result['latency']['p95_ms']:.1f} ms, "
+            f"p99 {result['latency']['p99_ms']:.1f} ms, "
+            f"recall@{RECALL_AT} {result[f'recall@{RECALL_AT}']:.3f}"
+        )
+
+    args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты записаны в {args.out}")
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
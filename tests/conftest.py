@@ -0,0 +1,8 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Конфиг бота читает переменные окружения при импорте — задаём их до импорта app
+_tmp_dir = Path(tempfile.mkdtemp(prefix="bookbot-tests-"))
+os.environ.setdefault("BOT_TOKEN", "test-token")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp_dir / 'test.db'}")
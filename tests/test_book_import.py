@@ -0,0 +1,91 @@
+import asyncio
+import zipfile
+
+import pytest
+from sqlalchemy import delete, select
+
+import app.services.book_import as book_import
+import app.services.file_sync as file_sync
+from app.models.book import Book, BookFile, Genre
+from app.models.db import async_session_factory, engine, init_db
+from app.services.file_sync import BookData
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    root = tmp_path / "books"
+    (root / "fantasy").mkdir(parents=True)
+    monkeypatch.setattr(book_import, "BOOKS_DIR_STORAGE", root)
+    monkeypatch.setattr(file_sync, "BOOKS_DIR_STORAGE", root)
+    return root
+
+
+async def _fill_catalog() -> int:
+    """
+    Каталог с одной книгой "The Hobbit - Tolkien" в формате pdf. Возвращает её id.
+    """
+    engine.echo = False
+    await init_db()
+    async with async_session_factory() as session:
+        await session.execute(delete(BookFile))
+        await session.execute(delete(Book))
+        await session.execute(delete(Genre))
+        book = Book(title="The Hobbit", author="Tolkien", genre=Genre(name="Фантастика"))
+        book.files.append(BookFile(format="pdf", path="fantasy/The Hobbit - Tolkien.pdf"))
+        session.add(book)
+        await session.commit()
+        return book.id
+
+
+async def _book_files() -> list[tuple[int, str, str]]:
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(BookFile.book_id, BookFile.format, BookFile.path).order_by(BookFile.path)
+        )
+        return list(result.tuples())
+
+
+def test_differently_cased_duplicate_is_skipped(storage, tmp_path):
+    archive_path = tmp_path / "books.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("fantasy/the hobbit - TOLKIEN.pdf", "duplicate")
+        archive.writestr("fantasy/Silmarillion - Tolkien.fb2", "new book")
+
+    async def scenario():
+        book_id = await _fill_catalog()
+        stats = await book_import.import_archive(archive_path)
+        return book_id, stats, await _book_files()
+
+    book_id, stats, files = asyncio.run(scenario())
+    assert (stats.files, stats.skipped, stats.invalid) == (1, 1, 0)
+    assert not (storage / "fantasy" / "the hobbit - TOLKIEN.pdf").exists()
+    assert (storage / "fantasy" / "Silmarillion - Tolkien.fb2").exists()
+    assert [(format_, path) for _, format_, path in files] == [
+        ("fb2", "fantasy/Silmarillion - Tolkien.fb2"),
+        ("pdf", "fantasy/The Hobbit - Tolkien.pdf"),
+    ]
+    assert files[1][0] == book_id
+
+
+def test_register_batch_skips_existing_book_format(storage):
+    # Файл, который не распознан как известный до распаковки (например, БД
+    # сравнивает строки без учёта диакритики), не должен ронять всю пачку
+    rel_path = "fantasy/The Hobbit - Tolkien (copy).pdf"
+    (storage / rel_path).write_text("duplicate")
+    duplicate = book_import._ImportedFile(
+        BookData(genre="fantasy", title="The Hobbit", author="Tolkien", format="pdf"),
+        rel_path,
+        size=9,
+        mtime_ns=0,
+        inode=0,
+    )
+
+    async def scenario():
+        await _fill_catalog()
+        skipped = await book_import._register_batch([duplicate], {})
+        return skipped, await _book_files()
+
+    skipped, files = asyncio.run(scenario())
+    assert skipped == [duplicate]
+    assert not (storage / rel_path).exists()
+    assert [path for _, _, path in files] == ["fantasy/The Hobbit - Tolkien.pdf"]
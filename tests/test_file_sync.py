@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import delete, select
+
+import app.services.file_sync as file_sync
+from app.models.book import Book, BookFile, Genre
+from app.models.db import async_session_factory, engine, init_db
+from app.services.catalog_version import get_catalog_version
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    root = tmp_path / "books"
+    (root / "fantasy").mkdir(parents=True)
+    monkeypatch.setattr(file_sync, "BOOKS_DIR_STORAGE", root)
+    monkeypatch.setattr(file_sync, "BOOKS_DIR_EXTRA_STORAGES", [])
+    return root
+
+
+async def _clear_catalog() -> None:
+    engine.echo = False
+    await init_db()
+    async with async_session_factory() as session:
+        await session.execute(delete(BookFile))
+        await session.execute(delete(Book))
+        await session.execute(delete(Genre))
+        await session.commit()
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_moved_file_is_not_counted_as_removed(storage, bulk):
+    for title in ("Dune", "Hyperion", "Solaris"):
+        (storage / "fantasy" / f"{title} - Author.fb2").write_text(title)
+
+    async def scenario():
+        await _clear_catalog()
+        await file_sync.sync_book_from_fs(bulk=bulk)
+        (storage / "fantasy" / "moved").mkdir()
+        os.rename(storage / "fantasy" / "Dune - Author.fb2", storage / "fantasy" / "moved" / "Dune - Author.fb2")
+        (storage / "fantasy" / "Hyperion - Author.fb2").unlink()
+        return await file_sync.sync_book_from_fs(bulk=bulk)
+
+    stats = asyncio.run(scenario())
+    assert (stats.removed, stats.unchanged) == (1, 1)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_duplicate_book_format_keeps_registered_path(storage, monkeypatch, bulk):
+    # sync_paths регистрирует пакетно, только если новых файлов не меньше пачки
+    monkeypatch.setattr(file_sync, "SYNC_BULK", bulk)
+    monkeypatch.setattr(file_sync, "SYNC_CHUNK_SIZE", 1)
+    (storage / "fantasy" / "sub").mkdir()
+    (storage / "fantasy" / "Dune - Author.fb2").write_text("first")
+
+    async def scenario():
+        await _clear_catalog()
+        await file_sync.sync_book_from_fs(bulk=bulk)
+        (storage / "fantasy" / "sub" / "Dune - Author.fb2").write_text("second")
+        syncs = (
+            lambda: file_sync.sync_book_from_fs(bulk=bulk),
+            lambda: file_sync.sync_book_from_fs(bulk=bulk),
+            lambda: file_sync.sync_paths(["fantasy/sub/Dune - Author.fb2"]),
+        )
+        results = []
+        for sync in syncs:
+            version = get_catalog_version()
+            stats = await sync()
+            results.append((stats.added, stats.duplicates, get_catalog_version() == version))
+        async with async_session_factory() as session:
+            paths = (await session.scalars(select(BookFile.path))).all()
+        return results, paths
+
+    results, paths = asyncio.run(scenario())
+    assert paths == ["fantasy/Dune - Author.fb2"]
+    assert results == [(0, 1, True)] * 3
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_duplicates_within_one_sync_register_one_file(storage, bulk):
+    (storage / "fantasy" / "sub").mkdir()
+    (storage / "fantasy" / "Dune - Author.fb2").write_text("first")
+    (storage / "fantasy" / "sub" / "Dune - Author.fb2").write_text("second")
+
+    async def scenario():
+        await _clear_catalog()
+        first = await file_sync.sync_book_from_fs(bulk=bulk)
+        second = await file_sync.sync_book_from_fs(bulk=bulk)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert (first.added, first.duplicates) == (1, 1)
+    assert (second.added, second.duplicates, second.changed) == (0, 1, False)
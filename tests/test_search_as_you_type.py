@@ -0,0 +1,47 @@
+import asyncio
+
+from sqlalchemy import delete, insert
+
+from app.models.book import Book, Genre
+from app.models.db import async_session_factory, engine, init_db
+from app.services.catalog_version import bump_catalog_version
+from app.services.search import search_books, search_books_as_you_type
+from app.services.search_index import build_search_index
+
+TITLES = [
+    ("Warhammer 40000", "Games Workshop"),
+    ("Warhammer Fantasy", "Games Workshop"),
+    ("Star Wars", "George Lucas"),
+    ("War and Peace", "Leo Tolstoy"),
+    ("The Art of War", "Sun Tzu"),
+]
+
+
+async def _fill_catalog() -> None:
+    engine.echo = False
+    await init_db()
+    async with async_session_factory() as session:
+        await session.execute(delete(Book))
+        await session.execute(delete(Genre))
+        genre_id = (await session.execute(insert(Genre).values(name="Разное"))).inserted_primary_key[0]
+        await session.execute(
+            insert(Book),
+            [{"genre_id": genre_id, "title": title, "author": author} for title, author in TITLES],
+        )
+        await session.commit()
+    bump_catalog_version()
+    await build_search_index()
+
+
+def test_typing_letter_by_letter_matches_full_search():
+    async def scenario():
+        await _fill_catalog()
+        query = "warhammer"
+        typed = []
+        for end in range(1, len(query) + 1):
+            typed = await search_books_as_you_type(user_id=1, query=query[:end])
+        return {book.title for book in typed}, {book.title for book in await search_books(query)}
+
+    typed, full = asyncio.run(scenario())
+    assert typed == full
+    assert {"Warhammer 40000", "Warhammer Fantasy"} <= typed
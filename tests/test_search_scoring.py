@@ -0,0 +1,36 @@
+import random
+
+from app.models.book import Book
+from app.services.search import _score_book, _score_books
+
+WORDS = [
+    "Война", "и", "мир", "Ёжик", "в", "тумане", "Мастер", "Маргарита",
+    "Лев", "Толстой", "Булгаков", "ёлка", "елка",
+    "Warhammer", "War", "and", "Peace", "The", "Art", "of", "Star", "Wars",
+    "Tolkien", "Lord", "Rings", "Гарри", "Поттер", "Harry", "Potter",
+]
+
+
+def _phrase(rng: random.Random, max_words: int) -> str:
+    words = rng.sample(WORDS, rng.randint(0, max_words))
+    if words and rng.random() < 0.3:
+        words[0] = words[0].upper()
+    return "  ".join(words) if rng.random() < 0.1 else " ".join(words)
+
+
+def test_batch_scoring_matches_reference():
+    rng = random.Random(20240101)
+    for _ in range(200):
+        query = _phrase(rng, 3)
+        books = [
+            Book(id=i, title=_phrase(rng, 5), author=_phrase(rng, 2))
+            for i in range(rng.randint(1, 20))
+        ]
+        expected = [_score_book(query, book) for book in books]
+        assert _score_books(query, books) == expected, query
+
+
+def test_empty_query_scores_zero():
+    book = Book(id=1, title="Война и мир", author="Лев Толстой")
+    assert _score_book("   ", book) == 0.0
+    assert _score_books("   ", [book]) == [0.0]